@@ -0,0 +1,77 @@
+# benchmarks/bench_digest.py
+# usage: python -m benchmarks.bench_digest [users]
+import random
+import sys
+import time
+from datetime import date
+
+from db.database import EPOCH_ORDINAL, today_epoch_day
+from services.digest import DigestRenderer
+
+MOVIES = 50
+MOVIES_PER_USER = 5
+
+def _make_users(users: int) -> list[list[dict]]:
+    rng = random.Random(0)
+    today_day = today_epoch_day()
+    catalog = []
+    for movie_id in range(MOVIES):
+        day = today_day + rng.randint(0, 120)
+        catalog.append({
+            "movie_id": movie_id,
+            "title": f"Blockbuster {movie_id}",
+            "release_date": date.fromordinal(day + EPOCH_ORDINAL).isoformat(),
+            "release_day": day
+        })
+    return [rng.sample(catalog, MOVIES_PER_USER) for _ in range(users)]
+
+def _render_legacy(header: str, tracked: list[dict], today_day: int) -> tuple[str, dict]:
+    # the per-user loop the reminder job used before DigestRenderer
+    reply = f"{header}\n\n"
+    inline_keyboard = {"inline_keyboard": []}
+    number = 1
+    for m in tracked:
+        days_left = m["release_day"] - today_day
+        if days_left > 0:
+            countdown_text = f"⏳ {days_left} day{'s' if days_left > 1 else ''} left"
+        elif days_left == 0:
+            countdown_text = "🎬 Releases today!"
+        else:
+            countdown_text = "✅ Already released"
+        reply += (
+            f"{number}.\n"
+            f"🎞️ {m['title']}\n"
+            f"📅 {m['release_date']} — {countdown_text}\n\n"
+        )
+        inline_keyboard["inline_keyboard"].append([
+            {"text": f"❌ Remove {number}", "callback_data": f"remove_{m['movie_id']}"},
+            {"text": "🔍 More Detail", "callback_data": f"detail_{m['movie_id']}"}
+        ])
+        number += 1
+    return reply, inline_keyboard
+
+def main(users: int = 100_000):
+    data = _make_users(users)
+    header = "🎬 Daily Reminder"
+    today_day = today_epoch_day()
+
+    start = time.perf_counter()
+    for tracked in data:
+        _render_legacy(header, tracked, today_day)
+    legacy = time.perf_counter() - start
+
+    renderer = DigestRenderer(today_day)
+    start = time.perf_counter()
+    for tracked in data:
+        renderer.render(header, tracked)
+    shared = time.perf_counter() - start
+
+    # both renderers must produce the same message
+    assert renderer.render(header, data[0]) == _render_legacy(header, data[0], today_day)
+
+    print(f"users: {users}, movies per user: {MOVIES_PER_USER}, distinct movies: {MOVIES}")
+    print(f"legacy : {legacy:.3f}s total, {legacy / users * 1e6:.2f} us/user")
+    print(f"digest : {shared:.3f}s total, {shared / users * 1e6:.2f} us/user")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,91 @@
+# benchmarks/bench_movie_memory.py
+# usage: python -m benchmarks.bench_movie_memory [sessions]
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from utils.movie_util import IMAGE_BASE, Movie, movie_from_tmdb, set_genre_lookup
+
+PAGES = 40
+PAGE_SIZE = 20
+PAGES_PER_SESSION = 3
+GENRES = {
+    28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy", 80: "Crime",
+    18: "Drama", 14: "Fantasy", 27: "Horror", 878: "Science Fiction", 53: "Thriller"
+}
+
+def _make_pages() -> list[str]:
+    # raw TMDB list responses; every session decodes its own copy, as a live fetch would
+    rng = random.Random(0)
+    pages = []
+    for page in range(PAGES):
+        results = []
+        for i in range(PAGE_SIZE):
+            movie_id = 1000 + page * PAGE_SIZE + i
+            results.append({
+                "id": movie_id,
+                "title": f"Blockbuster {movie_id}: The Sequel",
+                "release_date": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "genre_ids": rng.sample(list(GENRES), rng.randint(1, 3)),
+                "poster_path": f"/{movie_id:08x}poster.jpg",
+                "overview": "A plot summary that list views never show."
+            })
+        pages.append(json.dumps({"results": results}))
+    return pages
+
+def _process_legacy(results: list[dict]) -> list[dict]:
+    # what tmdb_service._process_movies built before Movie
+    movies = []
+    for movie in results:
+        movies.append({
+            "id": movie.get("id", ""),
+            "title": movie.get("title", ""),
+            "release_date": movie.get("release_date", ""),
+            "genres": [GENRES[g] for g in movie.get("genre_ids", []) if g in GENRES],
+            "poster": f"{IMAGE_BASE}{movie.get('poster_path', '')}",
+        })
+    return movies
+
+def _process_records(results: list[dict]) -> list[Movie]:
+    return [movie_from_tmdb(movie) for movie in results]
+
+def _measure(sessions: int, pages: list[str], process) -> tuple[int, list]:
+    rng = random.Random(1)
+    gc.collect()
+    tracemalloc.start()
+    retained = []
+    for _ in range(sessions):
+        session = []
+        for raw in rng.sample(pages, PAGES_PER_SESSION):
+            session.extend(process(json.loads(raw)["results"]))
+        retained.append(session)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, retained
+
+def main(sessions: int = 2_000):
+    set_genre_lookup(lambda: GENRES)
+    pages = _make_pages()
+
+    legacy_bytes, legacy = _measure(sessions, pages, _process_legacy)
+    del legacy
+    records_bytes, records = _measure(sessions, pages, _process_records)
+
+    # both forms must show the same movie
+    raw = json.loads(pages[0])["results"][:1]
+    old, new = _process_legacy(raw)[0], _process_records(raw)[0]
+    assert (old["id"], old["title"], old["release_date"], old["genres"], old["poster"]) == \
+        (new.id, new.title, new.release_date, new.genres, new.poster)
+
+    movies_per_session = PAGES_PER_SESSION * PAGE_SIZE
+    distinct = len({m.id for session in records for m in session})
+    print(f"sessions: {sessions}, movies per session: {movies_per_session}, distinct movies: {distinct}")
+    print(f"dicts  : {legacy_bytes / 1024:,.0f} KiB total, {legacy_bytes / sessions:,.0f} B/session")
+    print(f"Movie  : {records_bytes / 1024:,.0f} KiB total, {records_bytes / sessions:,.0f} B/session")
+    print(f"saved  : {1 - records_bytes / legacy_bytes:.1%}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
@@ -0,0 +1,84 @@
+# benchmarks/bench_reminders.py
+# usage: python -m benchmarks.bench_reminders [users] [movies_per_user]
+import os
+import random
+import sys
+import time
+
+from benchmarks.harness import (
+    bench_workdir, configure_environment, fake_upstreams, memory_report, percentiles,
+    print_report, start_memory_tracking, upstream_stats
+)
+
+MOVIES = 100
+REGIONS = ("US", "CA")
+
+def _seed(users: int, movies_per_user: int):
+    from benchmarks.fake_upstreams import _movie
+    from db.database import get_database
+
+    db = get_database()
+    rng = random.Random(0)
+    # the same dates the fake TMDB serves, so the release refresh finds no changes
+    catalog = [_movie(movie_id) for movie_id in range(1000, 1000 + MOVIES)]
+    for chat_id in range(1, users + 1):
+        db.add_user(chat_id, rng.choice(REGIONS))
+        for m in rng.sample(catalog, movies_per_user):
+            db.add_tracked_movie(chat_id, m["id"], m["title"], m["release_date"], "Action, Drama", "")
+    db.flush()
+
+def _run(users: int, movies_per_user: int) -> dict:
+    from services import scheduler
+
+    _seed(users, movies_per_user)
+
+    reports, latencies = [], []
+    run = scheduler.delivery_engine.run
+    def timed_run(messages, on_result=None):
+        # latency of one reminder: from leaving the generator to Telegram's answer
+        produced = {}
+        def stamped():
+            for message in messages:
+                produced[message[0]] = time.perf_counter()
+                yield message
+        def record(message, ok):
+            latencies.append(time.perf_counter() - produced.pop(message[0]))
+            if on_result is not None:
+                on_result(message, ok)
+        report = run(stamped(), on_result=record)
+        reports.append(report)
+        return report
+    scheduler.delivery_engine.run = timed_run
+
+    start_memory_tracking()
+    started = time.perf_counter()
+    scheduler.send_daily_reminders()
+    elapsed = time.perf_counter() - started
+
+    sent = sum(r.sent for r in reports)
+    return {
+        "users": users,
+        "shards": len(reports),
+        "sent": sent,
+        "failed": sum(r.failed for r in reports),
+        "retried": sum(r.retried for r in reports),
+        "rate_limited": sum(r.rate_limited for r in reports),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(sent / elapsed, 1) if elapsed else 0.0,
+        "send_ms": percentiles(latencies),
+        **memory_report()
+    }
+
+def main(users: int = 5000, movies_per_user: int = 5):
+    # every day of the fake catalog is a threshold, and Telegram's real limits do not apply
+    os.environ.setdefault("REMINDER_THRESHOLDS", ",".join(str(d) for d in range(181)))
+    os.environ.setdefault("TELEGRAM_GLOBAL_RATE", "1000")
+    os.environ.setdefault("TELEGRAM_PER_CHAT_INTERVAL", "0")
+    with bench_workdir() as workdir, fake_upstreams() as base_url:
+        configure_environment(base_url, workdir)
+        report = _run(users, movies_per_user)
+        report["upstream_calls"] = upstream_stats(base_url)
+    print_report(f"reminders: {users} users x {movies_per_user} movies", report)
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,99 @@
+# benchmarks/bench_webhook.py
+# usage: python -m benchmarks.bench_webhook [chats] [concurrency]
+import asyncio
+import itertools
+import sys
+import time
+
+from benchmarks.harness import (
+    bench_workdir, configure_environment, fake_upstreams, memory_report, percentiles,
+    print_report, start_memory_tracking, upstream_stats
+)
+
+# one browsing session per chat, in the order a real user would tap through it
+SCRIPT = [
+    ("message", "/start"),
+    ("callback", "region_US"),
+    ("message", "/upcoming"),
+    ("callback", "add_1000"),
+    ("callback", "next_5"),
+    ("callback", "detail_1001"),
+    ("message", "/upcoming_genre"),
+    ("callback", "genre_28"),
+    ("message", "/watchlist")
+]
+
+def _make_update(update_id: int, chat_id: int, kind: str, text: str) -> dict:
+    if kind == "callback":
+        return {"update_id": update_id, "callback_query": {
+            "id": str(update_id), "data": text,
+            "message": {"message_id": update_id, "chat": {"id": chat_id}}
+        }}
+    return {"update_id": update_id, "message": {"message_id": update_id, "chat": {"id": chat_id}, "text": text}}
+
+async def _run(chats: int, concurrency: int) -> dict:
+    import httpx
+    import main
+    from utils.http_util import close_async_client
+
+    handled = []
+    handler = main.update_queue.handler
+    async def timed_handler(update: dict):
+        start = time.perf_counter()
+        try:
+            await handler(update)
+        finally:
+            handled.append(time.perf_counter() - start)
+    main.update_queue.handler = timed_handler
+    main.update_queue.start()
+
+    update_ids = itertools.count(1)
+    acks, rejected = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def post(update: dict):
+            nonlocal rejected
+            async with semaphore:
+                while True:
+                    start = time.perf_counter()
+                    r = await client.post("/webhook", json=update)
+                    acks.append(time.perf_counter() - start)
+                    if r.status_code != 503:
+                        return
+                    # same as Telegram: back off and redeliver
+                    rejected += 1
+                    await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+
+        start_memory_tracking()
+        started = time.perf_counter()
+        for kind, text in SCRIPT:
+            # each step goes out for every chat before the next step starts
+            await asyncio.gather(*(
+                post(_make_update(next(update_ids), chat_id, kind, text)) for chat_id in range(1, chats + 1)
+            ))
+            await main.update_queue.join()
+        elapsed = time.perf_counter() - started
+
+    await main.update_queue.stop()
+    await close_async_client()
+    updates = chats * len(SCRIPT)
+    return {
+        "updates": updates,
+        "rejected (503)": rejected,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(updates / elapsed, 1),
+        "ack_ms": percentiles(acks),
+        "handler_ms": percentiles(handled),
+        **memory_report()
+    }
+
+def main(chats: int = 200, concurrency: int = 50):
+    with bench_workdir() as workdir, fake_upstreams() as base_url:
+        configure_environment(base_url, workdir)
+        report = asyncio.run(_run(chats, concurrency))
+        report["upstream_calls"] = upstream_stats(base_url)
+    print_report(f"webhook: {chats} chats x {len(SCRIPT)} updates, concurrency {concurrency}", report)
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
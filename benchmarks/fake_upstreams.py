@@ -0,0 +1,130 @@
+# benchmarks/fake_upstreams.py
+# usage: uvicorn benchmarks.fake_upstreams:app --port 8900
+import asyncio
+import itertools
+import os
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+
+# initialize settings
+FAKE_LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "20"))
+FAKE_JITTER_MS = float(os.getenv("FAKE_JITTER_MS", "10"))
+FAKE_ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))
+FAKE_RATE_LIMIT_RATE = float(os.getenv("FAKE_RATE_LIMIT_RATE", "0"))
+FAKE_RETRY_AFTER = int(os.getenv("FAKE_RETRY_AFTER", "1"))
+FAKE_PAGES = int(os.getenv("FAKE_PAGES", "5"))
+PAGE_RESULTS = 20
+GENRES = [
+    {"id": 28, "name": "Action"}, {"id": 12, "name": "Adventure"}, {"id": 16, "name": "Animation"},
+    {"id": 35, "name": "Comedy"}, {"id": 18, "name": "Drama"}, {"id": 27, "name": "Horror"},
+    {"id": 878, "name": "Science Fiction"}, {"id": 53, "name": "Thriller"}
+]
+
+# initialize variables
+app = FastAPI(title="Fake Telegram and TMDB")
+requests_seen: Counter = Counter()
+_message_ids = itertools.count(1)
+
+# --- Telegram Bot API ---
+@app.post("/bot{token}/{method}")
+async def telegram_method(token: str, method: str):
+    requests_seen[f"telegram.{method}"] += 1
+    await _delay()
+    if random.random() < FAKE_RATE_LIMIT_RATE:
+        requests_seen["telegram.429"] += 1
+        return JSONResponse(status_code=429, content={
+            "ok": False, "error_code": 429, "description": "Too Many Requests",
+            "parameters": {"retry_after": FAKE_RETRY_AFTER}
+        })
+    if random.random() < FAKE_ERROR_RATE:
+        requests_seen["telegram.500"] += 1
+        return JSONResponse(status_code=500, content={"ok": False, "error_code": 500, "description": "Internal Server Error"})
+
+    if method == "sendPhoto":
+        message_id = next(_message_ids)
+        return {"ok": True, "result": {"message_id": message_id, "photo": [
+            {"file_id": f"small-{message_id}", "width": 90, "height": 135},
+            {"file_id": f"large-{message_id}", "width": 500, "height": 750}
+        ]}}
+    if method in ("sendMessage", "editMessageText"):
+        return {"ok": True, "result": {"message_id": next(_message_ids)}}
+    return {"ok": True, "result": True}
+
+# --- TMDB ---
+@app.get("/3/authentication")
+async def tmdb_authentication():
+    return {"success": True, "status_code": 1, "status_message": "Success."}
+
+@app.get("/3/genre/movie/list")
+async def tmdb_genres():
+    return {"genres": GENRES}
+
+@app.get("/3/movie/upcoming")
+async def tmdb_upcoming(region: str = "US", page: int = 1):
+    return await _tmdb_page("upcoming", region, page)
+
+@app.get("/3/discover/movie")
+async def tmdb_discover(region: str = "US", page: int = 1, with_genres: int | None = None):
+    return await _tmdb_page("discover", region, page, with_genres)
+
+@app.get("/3/movie/{movie_id}")
+async def tmdb_movie(movie_id: int):
+    requests_seen["tmdb.movie"] += 1
+    await _delay()
+    if random.random() < FAKE_ERROR_RATE:
+        return JSONResponse(status_code=500, content={"status_code": 11, "status_message": "Internal error."})
+    movie = _movie(movie_id)
+    genre_ids = movie.pop("genre_ids")
+    movie["genres"] = [g for g in GENRES if g["id"] in genre_ids]
+    return movie
+
+@app.get("/images/{name}")
+async def tmdb_image(name: str):
+    requests_seen["tmdb.image"] += 1
+    await _delay()
+    return Response(content=b"\xff\xd8\xff" + name.encode() * 64, media_type="image/jpeg")
+
+@app.get("/_stats")
+def stats() -> dict:
+    return dict(requests_seen)
+
+@app.post("/_reset")
+def reset() -> dict:
+    requests_seen.clear()
+    return {"ok": True}
+
+# --- support functions ---
+async def _delay():
+    delay = FAKE_LATENCY_MS + random.uniform(-FAKE_JITTER_MS, FAKE_JITTER_MS)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+
+async def _tmdb_page(kind: str, region: str, page: int, genre_id: int | None = None):
+    requests_seen[f"tmdb.{kind}"] += 1
+    await _delay()
+    if random.random() < FAKE_ERROR_RATE:
+        return JSONResponse(status_code=500, content={"status_code": 11, "status_message": "Internal error."})
+    if page > FAKE_PAGES:
+        return {"page": page, "results": [], "total_pages": FAKE_PAGES, "total_results": FAKE_PAGES * PAGE_RESULTS}
+
+    # IDs are stable per (page, position), so synthetic callbacks can refer to them
+    first_id = 1000 + (page - 1) * PAGE_RESULTS
+    results = [_movie(movie_id) for movie_id in range(first_id, first_id + PAGE_RESULTS)]
+    if genre_id is not None:
+        for m in results:
+            m["genre_ids"] = sorted({genre_id, *m["genre_ids"]})
+    return {"page": page, "results": results, "total_pages": FAKE_PAGES, "total_results": FAKE_PAGES * PAGE_RESULTS}
+
+def _movie(movie_id: int) -> dict:
+    rng = random.Random(movie_id)
+    return {
+        "id": movie_id,
+        "title": f"Synthetic Movie {movie_id}",
+        "release_date": (date.today() + timedelta(days=rng.randint(0, 180))).isoformat(),
+        "genre_ids": sorted(g["id"] for g in rng.sample(GENRES, 2)),
+        "poster_path": f"/poster-{movie_id}.jpg"
+    }
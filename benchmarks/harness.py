@@ -0,0 +1,101 @@
+# benchmarks/harness.py
+import contextlib
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+def configure_environment(base_url: str, workdir: str):
+    """Point the bot at the fake upstreams and throwaway databases.
+
+    Must run before anything under services/ or db/ is imported, since
+    those modules read their settings at import time.
+    """
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": "bench-token",
+        "TELEGRAM_API_BASE": base_url,
+        "TMDB_BEARER_TOKEN": "bench-bearer",
+        "TMDB_API_BASE": f"{base_url}/3",
+        "TMDB_IMAGE_BASE": f"{base_url}/images",
+        "DATABASE_FILE": os.path.join(workdir, "bench.db"),
+        "CATALOG_FILE": os.path.join(workdir, "bench_catalog.db"),
+        "SESSION_DB_FILE": os.path.join(workdir, "bench_sessions.db"),
+        "SHARED_CACHE_FILE": os.path.join(workdir, "bench_shared_cache.db"),
+        "SCHEDULER_LOCK_FILE": os.path.join(workdir, "bench_scheduler.lock"),
+        # the genre cache rewrites this file; keep the repo's copy untouched
+        "GENRE_FILE": os.path.join(workdir, "genres.json")
+    })
+
+@contextlib.contextmanager
+def fake_upstreams(**settings):
+    """Run benchmarks.fake_upstreams in a subprocess and yield its base URL."""
+    port = _free_port()
+    env = dict(os.environ, **{k: str(v) for k, v in settings.items()})
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_upstreams:app",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_ready(base_url)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+@contextlib.contextmanager
+def bench_workdir():
+    with tempfile.TemporaryDirectory(prefix="movie-tracker-bench-") as workdir:
+        yield workdir
+
+def upstream_stats(base_url: str) -> dict:
+    return requests.get(f"{base_url}/_stats", timeout=5).json()
+
+def percentiles(samples: list[float]) -> dict:
+    # nearest-rank percentiles in milliseconds
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+    return {"p50": rank(50), "p95": rank(95), "p99": rank(99), "max": round(ordered[-1] * 1000, 2)}
+
+def start_memory_tracking():
+    tracemalloc.start()
+
+def memory_report() -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    # ru_maxrss is in KiB on Linux
+    return {
+        "traced_current_mb": round(current / 1024 / 1024, 2),
+        "traced_peak_mb": round(peak / 1024 / 1024, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    }
+
+def print_report(title: str, report: dict):
+    print(f"== {title} ==")
+    for key, value in report.items():
+        print(f"{key:>22}: {value}")
+
+# --- support functions ---
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_until_ready(base_url: str, timeout: float = 15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{base_url}/_stats", timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"fake upstreams did not start at {base_url}")
@@ -0,0 +1,172 @@
+# db/catalog.py
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from db.database import PRAGMAS, to_epoch_day
+
+# initialize settings
+CATALOG_FILE = os.getenv("CATALOG_FILE", "movie_catalog.db")
+CATALOG_PAGE_SIZE = 20
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", str(24 * 3600)))
+
+class Catalog:
+    """Local mirror of TMDB's upcoming/discover windows per region.
+
+    Rows are stored in the shape of TMDB results, so callers can treat a
+    catalog hit exactly like a live response.
+    """
+    def __init__(self, db_name: str = "movie_catalog.db", max_age: int = CATALOG_MAX_AGE):
+        self.db_path = Path(__file__).resolve().parent / db_name
+        self.max_age = max_age
+        self._local = threading.local()
+        self.init_db()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+        return conn
+
+    def init_db(self):
+        c = self.conn.cursor()
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_movies (
+            region TEXT,
+            movie_id INTEGER,
+            title TEXT,
+            release_date TEXT,
+            release_day INTEGER,
+            genre_ids TEXT,
+            poster_path TEXT,
+            upcoming_rank INTEGER,
+            PRIMARY KEY (region, movie_id)
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_movie_genres (
+            region TEXT,
+            genre_id INTEGER,
+            release_day INTEGER,
+            movie_id INTEGER,
+            PRIMARY KEY (region, genre_id, release_day, movie_id)
+        ) WITHOUT ROWID
+        """)
+        # discover_start/end: release day range fully mirrored, NULL when the sync was cut off
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_sync (
+            region TEXT PRIMARY KEY,
+            synced_at REAL,
+            discover_start INTEGER,
+            discover_end INTEGER
+        )
+        """)
+        columns = [r["name"] for r in c.execute("PRAGMA table_info(catalog_sync)")]
+        if "discover_start" not in columns:
+            c.execute("ALTER TABLE catalog_sync ADD COLUMN discover_start INTEGER")
+            c.execute("ALTER TABLE catalog_sync ADD COLUMN discover_end INTEGER")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_catalog_movies_release_day ON catalog_movies (region, release_day)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_catalog_movies_upcoming_rank ON catalog_movies (region, upcoming_rank)")
+        self.conn.commit()
+
+    def replace_region(
+        self,
+        region: str,
+        upcoming: list[dict],
+        discover: list[dict],
+        discover_window: Optional[tuple[int, int]] = None
+    ):
+        # swap a region's whole snapshot in one transaction so readers never see half a sync;
+        # `discover_window` is the release day range `discover` covers completely
+        movies = {}
+        for rank, m in enumerate(upcoming):
+            movies[m["id"]] = (m, rank)
+        for m in discover:
+            if m["id"] not in movies:
+                movies[m["id"]] = (m, None)
+
+        rows, genre_rows = [], []
+        for movie_id, (m, rank) in movies.items():
+            release_day = to_epoch_day(m.get("release_date"))
+            genre_ids = m.get("genre_ids", [])
+            rows.append((
+                region, movie_id, m.get("title", ""), m.get("release_date", ""), release_day,
+                ",".join(str(g) for g in genre_ids), m.get("poster_path") or "", rank
+            ))
+            if release_day is not None:
+                genre_rows.extend((region, g, release_day, movie_id) for g in genre_ids)
+
+        with self.conn:
+            self.conn.execute("DELETE FROM catalog_movies WHERE region=?", (region,))
+            self.conn.execute("DELETE FROM catalog_movie_genres WHERE region=?", (region,))
+            self.conn.executemany("INSERT INTO catalog_movies VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany("INSERT OR IGNORE INTO catalog_movie_genres VALUES (?, ?, ?, ?)", genre_rows)
+            window = discover_window or (None, None)
+            self.conn.execute("""
+            INSERT INTO catalog_sync (region, synced_at, discover_start, discover_end) VALUES (?, ?, ?, ?)
+            ON CONFLICT(region) DO UPDATE SET
+                synced_at=excluded.synced_at, discover_start=excluded.discover_start, discover_end=excluded.discover_end
+            """, (region, time.time(), *window))
+
+    def is_fresh(self, region: str) -> bool:
+        row = self.conn.execute("SELECT synced_at FROM catalog_sync WHERE region=?", (region,)).fetchone()
+        return row is not None and time.time() - row["synced_at"] < self.max_age
+
+    def get_upcoming(self, region: str, page: int = 1) -> Optional[list[dict]]:
+        # None means "not in the catalog", so the caller falls back to TMDB
+        if not self.is_fresh(region):
+            return None
+        rows = self.conn.execute("""
+        SELECT * FROM catalog_movies
+        WHERE region=? AND upcoming_rank IS NOT NULL
+        ORDER BY upcoming_rank
+        LIMIT ? OFFSET ?
+        """, (region, CATALOG_PAGE_SIZE, (page - 1) * CATALOG_PAGE_SIZE)).fetchall()
+        return [_to_result(r) for r in rows] or None
+
+    def get_by_genre(self, genre_id: int, region: str, start_day: int, end_day: int, page: int = 1) -> Optional[list[dict]]:
+        # only a fully mirrored window is served; its pages may then be empty, since
+        # TMDB's genre-filtered pages would not line up with ours
+        row = self.conn.execute(
+            "SELECT synced_at, discover_start, discover_end FROM catalog_sync WHERE region=?", (region,)
+        ).fetchone()
+        if (
+            row is None or time.time() - row["synced_at"] >= self.max_age
+            or row["discover_start"] is None or start_day < row["discover_start"] or end_day > row["discover_end"]
+        ):
+            return None
+        rows = self.conn.execute("""
+        SELECT m.* FROM catalog_movie_genres g
+        JOIN catalog_movies m ON m.region = g.region AND m.movie_id = g.movie_id
+        WHERE g.region=? AND g.genre_id=? AND g.release_day BETWEEN ? AND ?
+        ORDER BY g.release_day, g.movie_id
+        LIMIT ? OFFSET ?
+        """, (region, genre_id, start_day, end_day, CATALOG_PAGE_SIZE, (page - 1) * CATALOG_PAGE_SIZE)).fetchall()
+        return [_to_result(r) for r in rows]
+
+def _to_result(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["movie_id"],
+        "title": row["title"],
+        "release_date": row["release_date"],
+        "genre_ids": [int(g) for g in row["genre_ids"].split(",") if g],
+        "poster_path": row["poster_path"]
+    }
+
+# initialize variables
+_instance: Catalog | None = None
+_instance_lock = threading.Lock()
+
+def get_catalog() -> Catalog:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = Catalog(CATALOG_FILE)
+        return _instance
@@ -1,15 +1,117 @@
 # db/database.py
+import functools
+import inspect
+import os
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
-from datetime import datetime
-from typing import List, Tuple, Optional
+from datetime import date, datetime
+from typing import Callable, Iterator, List, Tuple, Optional
+
+from db.watchlist_index import TrackedMovie, WatchlistIndex
+from db.write_batcher import WriteBatcher
+from utils.metrics_util import registry
+from utils.worker_util import is_multi_worker
+
+# initialize settings
+DATABASE_FILE = os.getenv("DATABASE_FILE", "movie_tracker_bot.db")
+WRITE_BATCH_MS = float(os.getenv("DB_WRITE_BATCH_MS", "5"))
+# keep watchlists in memory; off with several workers, whose writes it would not see
+WATCHLIST_INDEX = os.getenv("WATCHLIST_INDEX", "0" if is_multi_worker() else "1") == "1"
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# initialize variables
+QUERY_SECONDS = registry.histogram("db_query_seconds", "Time spent in each Database method.", ("method",))
+
+def to_epoch_day(release_date: str | None) -> Optional[int]:
+    # "YYYY-MM-DD" -> days since 1970-01-01, None when missing or malformed
+    try:
+        return date.fromisoformat(release_date).toordinal() - EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        return None
+
+def today_epoch_day() -> int:
+    return date.today().toordinal() - EPOCH_ORDINAL
+
+def _timed(method):
+    # reads are timed on the caller, writes until their batch commits,
+    # generators only while producing rows (not while the consumer works)
+    name = method.__name__
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def generator_wrapper(self, *args, **kwargs):
+            rows = method(self, *args, **kwargs)
+            spent = 0.0
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(rows)
+                    except StopIteration:
+                        return
+                    finally:
+                        spent += time.perf_counter() - start
+                    yield item
+            finally:
+                rows.close()
+                QUERY_SECONDS.observe(spent, name)
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        if isinstance(result, Future):
+            result.add_done_callback(lambda _: QUERY_SECONDS.observe(time.perf_counter() - start, name))
+        else:
+            QUERY_SECONDS.observe(time.perf_counter() - start, name)
+        return result
+    return wrapper
 
 class Database:
-    def __init__(self, db_name: str = "movie_tracker_bot.db"):
+    """SQLite access with one connection per thread and batched writes.
+
+    Reads run on the calling thread's own connection. Writes are queued to a
+    single writer thread and return a Future that resolves once committed.
+
+    With `watchlist_index`, watchlist and region reads are served from a
+    WatchlistIndex loaded on first use and updated as writes commit.
+    """
+    def __init__(self, db_name: str = "movie_tracker_bot.db", watchlist_index: bool = False):
         self.db_path = Path(__file__).resolve().parent / db_name
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._use_index = watchlist_index
+        self._index: WatchlistIndex | None = None
+        self._index_lock = threading.Lock()
         self.init_db()
+        self._writer = WriteBatcher(self._connect, interval=WRITE_BATCH_MS / 1000)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
 
     def init_db(self):
         c = self.conn.cursor()
@@ -31,59 +133,383 @@ class Database:
             genres TEXT,
             poster TEXT,
             added_at TEXT,
+            release_day INTEGER,
             PRIMARY KEY (chat_id, movie_id),
             FOREIGN KEY (chat_id) REFERENCES users(chat_id)
         )
         """)
+        self._migrate_release_day(c)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_user_movies_release_day ON user_movies (release_day)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_user_movies_chat_release_day ON user_movies (chat_id, release_day)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_user_movies_movie_id ON user_movies (movie_id)")
+        # reminder shard bookkeeping, so restarts resume instead of re-sending
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS reminder_runs (
+            run_date TEXT,
+            region TEXT,
+            shard INTEGER,
+            last_chat_id INTEGER,
+            sent INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            started_at TEXT,
+            completed_at TEXT,
+            PRIMARY KEY (run_date, region, shard)
+        )
+        """)
+        # daily TMDB release date refresh and the changes it found
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS release_refreshes (
+            day INTEGER PRIMARY KEY,
+            movies INTEGER,
+            changed INTEGER,
+            refreshed_at TEXT
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS release_changes (
+            movie_id INTEGER,
+            day INTEGER,
+            old_release_date TEXT,
+            new_release_date TEXT,
+            PRIMARY KEY (movie_id, day)
+        )
+        """)
+        # Telegram file_id of each uploaded poster, reused instead of the TMDB URL
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS poster_files (
+            movie_id INTEGER PRIMARY KEY,
+            poster_url TEXT,
+            file_id TEXT,
+            updated_at TEXT
+        )
+        """)
         self.conn.commit()
 
+    def _migrate_release_day(self, c: sqlite3.Cursor):
+        # databases created before release_day existed keep dates only as TEXT
+        columns = [r["name"] for r in c.execute("PRAGMA table_info(user_movies)")]
+        if "release_day" in columns:
+            return
+        c.execute("ALTER TABLE user_movies ADD COLUMN release_day INTEGER")
+        rows = c.execute("SELECT chat_id, movie_id, release_date FROM user_movies").fetchall()
+        c.executemany(
+            "UPDATE user_movies SET release_day=? WHERE chat_id=? AND movie_id=?",
+            [(to_epoch_day(r["release_date"]), r["chat_id"], r["movie_id"]) for r in rows]
+        )
+
     # user table logic
-    def add_user(self, chat_id: int, region: str):
-        c = self.conn.cursor()
-        c.execute("""
+    @_timed
+    def add_user(self, chat_id: int, region: str) -> Future:
+        future = self._writer.submit("""
         INSERT INTO users (chat_id, region, created_at)
         VALUES (?, ?, ?)
         ON CONFLICT(chat_id) DO UPDATE SET region=excluded.region
         """, (chat_id, region, datetime.now().isoformat()))
-        self.conn.commit()
+        return self._write_through(future, lambda index: index.set_region(chat_id, region))
 
+    @_timed
     def get_user_region(self, chat_id: int) -> Optional[str]:
+        index = self._watchlist()
+        if index is not None:
+            return index.region(chat_id)
         c = self.conn.cursor()
         c.execute("SELECT region FROM users WHERE chat_id=?", (chat_id,))
         row = c.fetchone()
         return row["region"] if row else None
 
+    @_timed
+    def get_regions(self) -> List[str]:
+        index = self._watchlist()
+        if index is not None:
+            return list(index.regions())
+        c = self.conn.cursor()
+        c.execute("SELECT DISTINCT region FROM users WHERE region IS NOT NULL")
+        return [r["region"] for r in c.fetchall()]
+
     # user tracking table logic
-    def add_tracked_movie(self, chat_id: int, movie_id: int, title: str, release_date: str, genres: str, poster: str):
+    @_timed
+    def add_tracked_movie(self, chat_id: int, movie_id: int, title: str, release_date: str, genres: str, poster: str) -> Future:
+        movie = TrackedMovie(
+            chat_id, movie_id, title, release_date, genres, poster, datetime.now().isoformat(), to_epoch_day(release_date)
+        )
+        future = self._writer.submit("""
+        INSERT OR IGNORE INTO user_movies (chat_id, movie_id, title, release_date, genres, poster, added_at, release_day)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, movie)
+        return self._write_through(future, lambda index: index.add(TrackedMovie.from_row(movie)))
+
+    @_timed
+    def remove_tracked_movie(self, chat_id: int, movie_id: int) -> Future:
+        future = self._writer.submit("DELETE FROM user_movies WHERE chat_id=? AND movie_id=?", (chat_id, movie_id))
+        return self._write_through(future, lambda index: index.remove(chat_id, movie_id))
+
+    @_timed
+    def get_user_tracked_movies(self, chat_id: int) -> List[TrackedMovie]:
+        # undated movies go last
+        index = self._watchlist()
+        if index is not None:
+            return sorted(index.movies(chat_id), key=lambda m: (m.release_day is None, m.release_day or 0))
         c = self.conn.cursor()
         c.execute("""
-        INSERT OR IGNORE INTO user_movies (chat_id, movie_id, title, release_date, genres, poster, added_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (chat_id, movie_id, title, release_date, genres, poster, datetime.now().isoformat()))
-        self.conn.commit()
+        SELECT * FROM user_movies WHERE chat_id=?
+        ORDER BY release_day IS NULL, release_day
+        """, (chat_id,))
+        return [TrackedMovie.from_row(r) for r in c.fetchall()]
 
-    def remove_tracked_movie(self, chat_id: int, movie_id: int):
+    @_timed
+    def get_tracked_movie(self, chat_id: int, movie_id: int) -> Optional[TrackedMovie]:
+        index = self._watchlist()
+        if index is not None:
+            return index.get(chat_id, movie_id)
         c = self.conn.cursor()
-        c.execute("DELETE FROM user_movies WHERE chat_id=? AND movie_id=?", (chat_id, movie_id))
-        self.conn.commit()
+        c.execute("SELECT * FROM user_movies WHERE chat_id=? AND movie_id=?", (chat_id, movie_id))
+        row = c.fetchone()
+        return TrackedMovie.from_row(row) if row else None
 
-    def get_user_tracked_movies(self, chat_id: int) -> List[sqlite3.Row]:
+    @_timed
+    def get_movie_trackers(self, movie_id: int) -> set[int]:
+        # chat_ids of everyone tracking the movie
+        index = self._watchlist()
+        if index is not None:
+            return index.trackers(movie_id)
         c = self.conn.cursor()
-        c.execute("SELECT * FROM user_movies WHERE chat_id=?", (chat_id,))
-        return c.fetchall()
+        c.execute("SELECT chat_id FROM user_movies WHERE movie_id=?", (movie_id,))
+        return {r["chat_id"] for r in c.fetchall()}
+
+    @_timed
+    def iter_user_movies(
+        self,
+        start_day: Optional[int] = None,
+        end_day: Optional[int] = None,
+        region: Optional[str] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        after_chat_id: Optional[int] = None,
+        batch_size: int = 500
+    ) -> Iterator[Tuple[int, List[TrackedMovie]]]:
+        # one ordered cursor read in batches, so memory stays bounded by the largest watchlist;
+        # optional filters: release window [start_day, end_day], the user's region
+        # (users without one count as US), shard (index, count) of chat_ids, resume point
+        index = self._watchlist()
+        if index is not None:
+            yield from self._iter_indexed_movies(index, start_day, end_day, region, shard, after_chat_id)
+            return
+        conditions, params = [], []
+        if start_day is not None or end_day is not None:
+            conditions.append("um.release_day BETWEEN ? AND ?")
+            params += [start_day if start_day is not None else -2**31, end_day if end_day is not None else 2**31]
+        if region is not None:
+            conditions.append("COALESCE(u.region, 'US') = ?")
+            params.append(region)
+        if shard is not None:
+            conditions.append("ABS(um.chat_id) % ? = ?")
+            params += [shard[1], shard[0]]
+        if after_chat_id is not None:
+            conditions.append("um.chat_id > ?")
+            params.append(after_chat_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        c = self.conn.cursor()
+        c.execute(f"""
+        SELECT um.* FROM user_movies um
+        LEFT JOIN users u ON u.chat_id = um.chat_id
+        {where}
+        ORDER BY um.chat_id, um.release_day
+        """, params)
+        chat_id, movies = None, []
+        while True:
+            rows = c.fetchmany(batch_size)
+            if not rows:
+                break
+            for r in rows:
+                if r["chat_id"] != chat_id:
+                    if movies:
+                        yield chat_id, movies
+                    chat_id, movies = r["chat_id"], []
+                movies.append(TrackedMovie.from_row(r))
+        if movies:
+            yield chat_id, movies
+
+    def _iter_indexed_movies(
+        self,
+        index: WatchlistIndex,
+        start_day: Optional[int],
+        end_day: Optional[int],
+        region: Optional[str],
+        shard: Optional[Tuple[int, int]],
+        after_chat_id: Optional[int]
+    ) -> Iterator[Tuple[int, List[TrackedMovie]]]:
+        # same filters and order as the SQL in iter_user_movies
+        windowed = start_day is not None or end_day is not None
+        low = start_day if start_day is not None else -2**31
+        high = end_day if end_day is not None else 2**31
+        for chat_id in index.chat_ids():
+            if after_chat_id is not None and chat_id <= after_chat_id:
+                continue
+            if shard is not None and abs(chat_id) % shard[1] != shard[0]:
+                continue
+            if region is not None and (index.region(chat_id) or "US") != region:
+                continue
+            movies = index.movies(chat_id)
+            if windowed:
+                movies = [m for m in movies if m.release_day is not None and low <= m.release_day <= high]
+            if movies:
+                # SQLite sorts NULL first
+                movies.sort(key=lambda m: (m.release_day is not None, m.release_day or 0))
+                yield chat_id, movies
+
+    @_timed
+    def get_tracked_release_dates(self, from_day: int) -> dict[int, set[str]]:
+        # distinct stored dates of every tracked movie that is not yet long released
+        index = self._watchlist()
+        if index is not None:
+            return index.tracked_release_dates(from_day)
+        c = self.conn.cursor()
+        c.execute("""
+        SELECT movie_id, release_date FROM user_movies
+        WHERE release_day >= ? OR release_day IS NULL
+        GROUP BY movie_id, release_date
+        """, (from_day,))
+        dates = {}
+        for r in c.fetchall():
+            dates.setdefault(r["movie_id"], set()).add(r["release_date"] or "")
+        return dates
+
+    @_timed
+    def update_release_date(self, movie_id: int, release_date: str) -> Future:
+        release_day = to_epoch_day(release_date)
+        future = self._writer.submit("""
+        UPDATE user_movies SET release_date=?, release_day=?
+        WHERE movie_id=? AND release_date IS NOT ?
+        """, (release_date, release_day, movie_id, release_date))
+        return self._write_through(future, lambda index: index.update_release_date(movie_id, release_date, release_day))
+
+    # release refresh logic
+    @_timed
+    def is_release_refreshed(self, day: int) -> bool:
+        c = self.conn.cursor()
+        c.execute("SELECT 1 FROM release_refreshes WHERE day=?", (day,))
+        return c.fetchone() is not None
+
+    @_timed
+    def add_release_change(self, movie_id: int, day: int, old_release_date: str, new_release_date: str) -> Future:
+        return self._writer.submit("""
+        INSERT OR REPLACE INTO release_changes (movie_id, day, old_release_date, new_release_date)
+        VALUES (?, ?, ?, ?)
+        """, (movie_id, day, old_release_date, new_release_date))
+
+    @_timed
+    def complete_release_refresh(self, day: int, movies: int, changed: int) -> Future:
+        return self._writer.submit("""
+        INSERT OR REPLACE INTO release_refreshes (day, movies, changed, refreshed_at) VALUES (?, ?, ?, ?)
+        """, (day, movies, changed, datetime.now().isoformat()))
+
+    @_timed
+    def get_changed_movie_ids(self, day: int) -> set[int]:
+        c = self.conn.cursor()
+        c.execute("SELECT movie_id FROM release_changes WHERE day=?", (day,))
+        return {r["movie_id"] for r in c.fetchall()}
 
-    def get_all_user_movies(self) -> dict[int, list[sqlite3.Row]]:
+    # poster file logic
+    @_timed
+    def get_poster_file_id(self, movie_id: int, poster_url: str) -> Optional[str]:
+        # a changed poster URL means a different image, so the old file_id no longer applies
         c = self.conn.cursor()
-        c.execute("SELECT * FROM user_movies ORDER BY chat_id")
-        rows = c.fetchall()
-        
-        user_movies = {}
-        for r in rows:
-            chat_id = r["chat_id"]
-            if chat_id not in user_movies:
-                user_movies[chat_id] = []
-            user_movies[chat_id].append(r)
-        return user_movies
+        c.execute("SELECT file_id FROM poster_files WHERE movie_id=? AND poster_url=?", (movie_id, poster_url))
+        row = c.fetchone()
+        return row["file_id"] if row else None
+
+    @_timed
+    def set_poster_file_id(self, movie_id: int, poster_url: str, file_id: str) -> Future:
+        return self._writer.submit("""
+        INSERT INTO poster_files (movie_id, poster_url, file_id, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(movie_id) DO UPDATE SET
+            poster_url=excluded.poster_url, file_id=excluded.file_id, updated_at=excluded.updated_at
+        """, (movie_id, poster_url, file_id, datetime.now().isoformat()))
+
+    @_timed
+    def delete_poster_file_id(self, movie_id: int) -> Future:
+        return self._writer.submit("DELETE FROM poster_files WHERE movie_id=?", (movie_id,))
+
+    # reminder run logic
+    @_timed
+    def get_reminder_run(self, run_date: str, region: str, shard: int) -> Optional[sqlite3.Row]:
+        c = self.conn.cursor()
+        c.execute("SELECT * FROM reminder_runs WHERE run_date=? AND region=? AND shard=?", (run_date, region, shard))
+        return c.fetchone()
+
+    @_timed
+    def get_reminder_runs(self, run_date: str) -> List[sqlite3.Row]:
+        c = self.conn.cursor()
+        c.execute("SELECT * FROM reminder_runs WHERE run_date=? ORDER BY region, shard", (run_date,))
+        return c.fetchall()
+
+    @_timed
+    def start_reminder_run(self, run_date: str, region: str, shard: int) -> Future:
+        return self._writer.submit("""
+        INSERT INTO reminder_runs (run_date, region, shard, started_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(run_date, region, shard) DO NOTHING
+        """, (run_date, region, shard, datetime.now().isoformat()))
+
+    @_timed
+    def update_reminder_run(self, run_date: str, region: str, shard: int, last_chat_id: int, sent: int, failed: int) -> Future:
+        return self._writer.submit("""
+        UPDATE reminder_runs SET last_chat_id=?, sent=sent+?, failed=failed+?
+        WHERE run_date=? AND region=? AND shard=?
+        """, (last_chat_id, sent, failed, run_date, region, shard))
+
+    @_timed
+    def complete_reminder_run(self, run_date: str, region: str, shard: int) -> Future:
+        return self._writer.submit("""
+        UPDATE reminder_runs SET completed_at=? WHERE run_date=? AND region=? AND shard=?
+        """, (datetime.now().isoformat(), run_date, region, shard))
+
+    def flush(self):
+        self._writer.flush()
+
+    def _watchlist(self) -> Optional[WatchlistIndex]:
+        # loaded on first use, so startup does not pay for reading every watchlist
+        if not self._use_index:
+            return None
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    index = WatchlistIndex()
+                    index.load(
+                        self.conn.execute("SELECT * FROM user_movies"),
+                        self.conn.execute("SELECT chat_id, region FROM users")
+                    )
+                    self._index = index
+        return self._index
+
+    def _write_through(self, future: Future, apply: Callable[[WatchlistIndex], None]) -> Future:
+        # runs on the writer thread after commit, before the caller's own callbacks;
+        # holding the lock while the index loads keeps a commit from slipping past it
+        if not self._use_index:
+            return future
+        def on_done(f: Future):
+            if f.cancelled() or f.exception() is not None:
+                return
+            with self._index_lock:
+                if self._index is not None:
+                    apply(self._index)
+        future.add_done_callback(on_done)
+        return future
 
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        self._writer.close()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+# initialize variables
+_instance: Database | None = None
+_instance_lock = threading.Lock()
+
+def get_database() -> Database:
+    # one shared Database (and writer thread) per process
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = Database(DATABASE_FILE, watchlist_index=WATCHLIST_INDEX)
+        return _instance
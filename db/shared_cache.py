@@ -0,0 +1,79 @@
+# db/shared_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Hashable
+
+from db.database import PRAGMAS
+
+# initialize settings
+SHARED_CACHE_FILE = os.getenv("SHARED_CACHE_FILE", "shared_cache.db")
+SHARED_CACHE_PRUNE_EVERY = 500
+
+class SharedCache:
+    """JSON key/value cache in SQLite, shared by every worker process on the host.
+
+    It sits behind the per-process TTLCache: a worker that misses locally
+    picks up what another worker already fetched instead of calling TMDB.
+    Keys must be JSON-serializable; tuples come back as lists, which only
+    matters for values.
+    """
+    def __init__(self, db_name: str = "shared_cache.db"):
+        self.db_path = Path(__file__).resolve().parent / db_name
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self.init_db()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+        return conn
+
+    def init_db(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS shared_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            expires_at REAL
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_shared_cache_expires_at ON shared_cache (expires_at)")
+
+    def get(self, key: Hashable) -> Any | None:
+        row = self.conn.execute(
+            "SELECT value FROM shared_cache WHERE key=? AND expires_at>?", (_encode_key(key), time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        self.conn.execute("""
+        INSERT INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET value=excluded.value, expires_at=excluded.expires_at
+        """, (_encode_key(key), json.dumps(value, separators=(",", ":")), time.time() + ttl))
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % SHARED_CACHE_PRUNE_EVERY == 0
+        if prune:
+            self.conn.execute("DELETE FROM shared_cache WHERE expires_at<=?", (time.time(),))
+
+def _encode_key(key: Hashable) -> str:
+    return json.dumps(key, separators=(",", ":"))
+
+# initialize variables
+_instance: SharedCache | None = None
+_instance_lock = threading.Lock()
+
+def get_shared_cache() -> SharedCache:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = SharedCache(SHARED_CACHE_FILE)
+        return _instance
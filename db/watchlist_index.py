@@ -0,0 +1,128 @@
+# db/watchlist_index.py
+import sys
+import threading
+from typing import Any, Iterable, NamedTuple, Optional
+
+class TrackedMovie(NamedTuple):
+    """One user_movies row as a tuple; also indexable by column name like sqlite3.Row."""
+    chat_id: int
+    movie_id: int
+    title: str
+    release_date: str
+    genres: str
+    poster: str
+    added_at: str
+    release_day: Optional[int]
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    def keys(self) -> tuple[str, ...]:
+        return self._fields
+
+    @classmethod
+    def from_row(cls, row) -> "TrackedMovie":
+        # strings repeat across users tracking the same movie, so share one copy
+        return cls(
+            row["chat_id"],
+            row["movie_id"],
+            _intern(row["title"]),
+            _intern(row["release_date"]),
+            _intern(row["genres"]),
+            _intern(row["poster"]),
+            row["added_at"],
+            row["release_day"]
+        )
+
+class WatchlistIndex:
+    """In-memory copy of user_movies and users.region for O(1) lookups.
+
+    Holds chat_id -> {movie_id -> TrackedMovie}, the reverse movie_id -> chat_ids
+    and chat_id -> region. Database applies each write here once it commits,
+    so the index only sees what SQLite has; it is not aware of writes made
+    by other processes.
+    """
+    def __init__(self):
+        self._movies: dict[int, dict[int, TrackedMovie]] = {}
+        self._trackers: dict[int, set[int]] = {}
+        self._regions: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self, movie_rows: Iterable, user_rows: Iterable):
+        with self._lock:
+            for row in movie_rows:
+                self._add_locked(TrackedMovie.from_row(row))
+            for row in user_rows:
+                if row["region"] is not None:
+                    self._regions[row["chat_id"]] = row["region"]
+
+    def add(self, movie: TrackedMovie):
+        # mirrors INSERT OR IGNORE: an existing entry is kept as it is
+        with self._lock:
+            if movie.movie_id not in self._movies.get(movie.chat_id, {}):
+                self._add_locked(movie)
+
+    def remove(self, chat_id: int, movie_id: int):
+        with self._lock:
+            movies = self._movies.get(chat_id)
+            if not movies or movies.pop(movie_id, None) is None:
+                return
+            if not movies:
+                del self._movies[chat_id]
+            trackers = self._trackers[movie_id]
+            trackers.discard(chat_id)
+            if not trackers:
+                del self._trackers[movie_id]
+
+    def update_release_date(self, movie_id: int, release_date: str, release_day: Optional[int]):
+        release_date = _intern(release_date)
+        with self._lock:
+            for chat_id in self._trackers.get(movie_id, ()):
+                movies = self._movies[chat_id]
+                movies[movie_id] = movies[movie_id]._replace(release_date=release_date, release_day=release_day)
+
+    def set_region(self, chat_id: int, region: str):
+        with self._lock:
+            self._regions[chat_id] = region
+
+    def get(self, chat_id: int, movie_id: int) -> Optional[TrackedMovie]:
+        return self._movies.get(chat_id, {}).get(movie_id)
+
+    def movies(self, chat_id: int) -> list[TrackedMovie]:
+        with self._lock:
+            return list(self._movies.get(chat_id, {}).values())
+
+    def trackers(self, movie_id: int) -> set[int]:
+        with self._lock:
+            return set(self._trackers.get(movie_id, ()))
+
+    def chat_ids(self) -> list[int]:
+        with self._lock:
+            return sorted(self._movies)
+
+    def region(self, chat_id: int) -> Optional[str]:
+        return self._regions.get(chat_id)
+
+    def regions(self) -> set[str]:
+        with self._lock:
+            return set(self._regions.values())
+
+    def tracked_release_dates(self, from_day: int) -> dict[int, set[str]]:
+        with self._lock:
+            dates = {}
+            for movie_id, chat_ids in self._trackers.items():
+                for chat_id in chat_ids:
+                    movie = self._movies[chat_id][movie_id]
+                    if movie.release_day is None or movie.release_day >= from_day:
+                        dates.setdefault(movie_id, set()).add(movie.release_date or "")
+            return dates
+
+    # --- support functions ---
+    def _add_locked(self, movie: TrackedMovie):
+        self._movies.setdefault(movie.chat_id, {})[movie.movie_id] = movie
+        self._trackers.setdefault(movie.movie_id, set()).add(movie.chat_id)
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
@@ -0,0 +1,103 @@
+# db/write_batcher.py
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+# initialize settings
+BUSY_RETRIES = 3
+
+class WriteBatcher:
+    """Write-behind queue that commits statements submitted within `interval` seconds as one transaction.
+
+    Every submitted statement gets a Future that resolves once its batch is committed.
+    """
+    def __init__(self, connect: Callable[[], sqlite3.Connection], interval: float = 0.005, max_batch: int = 500):
+        self.interval = interval
+        self.max_batch = max_batch
+        self._connect = connect
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-write-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql: str, params: tuple | list = ()) -> Future:
+        future = Future()
+        self._queue.put((sql, params, future))
+        return future
+
+    def flush(self):
+        # resolves after everything submitted before it has been committed
+        self.submit("", ()).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    # --- support functions ---
+    def _run(self):
+        conn = self._connect()
+        conn.isolation_level = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.interval
+            stop = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+            if stop:
+                break
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list):
+        # other worker processes write to the same file; when one of them holds the
+        # write lock past busy_timeout, retry the batch before failing its futures
+        for attempt in range(BUSY_RETRIES):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or attempt == BUSY_RETRIES - 1:
+                    for _, _, future in batch:
+                        future.set_exception(e)
+                    return
+                time.sleep(0.05 * 2 ** attempt)
+
+        results = []
+        try:
+            for sql, params, future in batch:
+                if not sql:
+                    results.append((future, None, None))
+                    continue
+                try:
+                    results.append((future, conn.execute(sql, params).rowcount, None))
+                except sqlite3.Error as e:
+                    # a bad statement fails alone instead of rolling back its neighbours
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for future, rowcount, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(rowcount)
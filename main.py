@@ -1,22 +1,31 @@
 # main.py
+import asyncio
 import os
 
-import requests
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 
 # load env file
 load_dotenv()
 
-from services.scheduler import start_scheduler
+from services.scheduler import get_reminder_progress, start_scheduler_when_leader, stop_scheduler
 from services.telegram_service import handle_telegram_update, set_bot_commands
-from services.tmdb_service import check_validation
+from services.tmdb_service import check_validation, get_genres
+from services.update_queue import UpdateQueue
+from utils.http_util import close_async_client, request_sync
+from utils.metrics_util import registry
+from utils.telegram_util import TELEGRAM_API_BASE
 
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")  
-BASE_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+BASE_URL = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}"
 
 app = FastAPI(title="Movie Tracker API")
+update_queue = UpdateQueue(handle_telegram_update)
+_startup_tasks: set[asyncio.Task] = set()
+WEBHOOK_REJECTED = registry.counter("webhook_rejected_total", "Updates rejected with 503 because the queue was full.")
+registry.gauge("update_queue_size", "Updates waiting to be handled.", (), lambda: {(): update_queue.qsize()})
 
 @app.get("/health")
 def health_check():
@@ -26,15 +35,44 @@ def health_check():
 async def telegram_webhook(request: Request) -> dict:
     """Telegram webhook endpoint"""
     update = await request.json()
-    handle_telegram_update(update)
+    if update_queue.closing:
+        # shutting down; Telegram redelivers the update to the next process
+        raise HTTPException(status_code=503, detail="shutting down", headers={"Retry-After": "5"})
+    if not update_queue.submit(update):
+        # Telegram redelivers the update later when we reject it
+        WEBHOOK_REJECTED.inc()
+        raise HTTPException(status_code=503, detail="update queue is full", headers={"Retry-After": "1"})
     return {"ok": True}
 
+@app.get("/reminders/progress")
+def reminder_progress() -> dict:
+    return get_reminder_progress()
+
+@app.get("/metrics")
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/set_webhook")
 def set_webhook() -> dict:
     set_bot_commands()
-    r = requests.post(f'''{BASE_URL}/setWebhook''', json={"url": f'''{WEBHOOK_URL}/webhook'''})
+    r = request_sync("POST", f'''{BASE_URL}/setWebhook''', json={"url": f'''{WEBHOOK_URL}/webhook'''})
     return r.json()
 
 @app.on_event("startup")
-def on_startup():
-    start_scheduler()
\ No newline at end of file
+async def on_startup():
+    # nothing here may wait on the network: the app has to take traffic right away
+    update_queue.start()
+    # reads genres.json and refreshes it in a background thread when stale
+    get_genres()
+    task = asyncio.create_task(start_scheduler_when_leader())
+    _startup_tasks.add(task)
+    task.add_done_callback(_startup_tasks.discard)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # drain acknowledged updates first, while the scheduler, DB and HTTP client still work
+    await update_queue.stop()
+    for task in _startup_tasks:
+        task.cancel()
+    stop_scheduler()
+    await close_async_client()
\ No newline at end of file
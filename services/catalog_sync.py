@@ -0,0 +1,46 @@
+# services/catalog_sync.py
+import os
+import time
+
+from db.catalog import get_catalog
+from db.database import get_database, to_epoch_day
+from services.tmdb_service import discover_window, fetch_discover_results, fetch_upcoming_results
+
+# initialize settings
+CATALOG_SYNC_PAGES = int(os.getenv("CATALOG_SYNC_PAGES", "5"))
+# genre lists are only served from the catalog when the whole discover window fits in this many pages
+CATALOG_DISCOVER_MAX_PAGES = int(os.getenv("CATALOG_DISCOVER_MAX_PAGES", "50"))
+
+def sync_catalog(pages: int = CATALOG_SYNC_PAGES, discover_pages: int = CATALOG_DISCOVER_MAX_PAGES) -> dict:
+    # mirror upcoming + the discover window for every region users have picked
+    start_time = time.time()
+    window_start, window_end = discover_window()
+    catalog = get_catalog()
+    regions = get_database().get_regions() or ["US"]
+    synced = {}
+    for region in regions:
+        try:
+            upcoming, _ = _fetch_pages(fetch_upcoming_results, region, pages)
+            discover, complete = _fetch_pages(fetch_discover_results, region, discover_pages)
+            # a cut-off window would silently shorten every genre list
+            window = (to_epoch_day(window_start), to_epoch_day(window_end)) if complete else None
+            catalog.replace_region(region, upcoming, discover, window)
+            synced[region] = len(upcoming) + len(discover)
+        except Exception as e:
+            print(f"Catalog sync failed for {region}: {e}")
+    elapsed = round(time.time() - start_time, 3)
+    print(f"Catalog sync: {synced} in {elapsed}s")
+    return synced
+
+# --- support functions ---
+def _fetch_pages(fetch, region: str, pages: int) -> tuple[list[dict], bool]:
+    # (results, whether every page TMDB has was fetched)
+    results = []
+    page = 1
+    while page <= pages:
+        data = fetch(region, page)
+        results.extend(data.get("results", []))
+        if page >= data.get("total_pages", 1):
+            return results, True
+        page += 1
+    return results, False
@@ -0,0 +1,202 @@
+# services/delivery.py
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import httpx
+
+from utils.http_util import UpstreamUnavailable, new_async_client
+from utils.rate_limit_util import KeyedRateLimiter, ThreadSafeTokenBucket
+from utils.telegram_util import BASE_URL, build_message_payload
+
+# initialize settings
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+PER_CHAT_INTERVAL = float(os.getenv("TELEGRAM_PER_CHAT_INTERVAL", "1"))
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", "30"))
+DELIVERY_MAX_RETRIES = int(os.getenv("DELIVERY_MAX_RETRIES", "3"))
+DELIVERY_BACKOFF = float(os.getenv("DELIVERY_BACKOFF", "0.5"))
+# shortest hold while Telegram's circuit is open, e.g. during its half-open trial call
+CIRCUIT_MIN_PAUSE = 1.0
+# how long one message may wait on an open circuit before the run gives up on the rest
+DELIVERY_CIRCUIT_TIMEOUT = float(os.getenv("DELIVERY_CIRCUIT_TIMEOUT", "300"))
+
+# (chat_id, text, inline_keyboard)
+Message = tuple[int, str, dict | None]
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    rate_limited: int = 0
+    elapsed: float = 0.0
+    # Telegram stayed unreachable; messages left unsent were not reported to on_result
+    aborted: bool = False
+
+    @property
+    def throughput(self) -> float:
+        return round(self.sent / self.elapsed, 2) if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rate_limited": self.rate_limited,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": self.throughput,
+            "aborted": self.aborted
+        }
+
+class DeliveryEngine:
+    """Sends many Telegram messages concurrently within Telegram's rate limits.
+
+    The global bucket belongs to the engine, so runs that overlap in
+    different threads share one send rate. If Telegram's circuit stays open
+    longer than `circuit_timeout`, the run stops early and sets
+    `report.aborted`; the messages it could not send are counted as failed
+    but not passed to `on_result`, so the caller can resume them later.
+    """
+    def __init__(
+        self,
+        global_rate: float = GLOBAL_RATE,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+        concurrency: int = DELIVERY_CONCURRENCY,
+        max_retries: int = DELIVERY_MAX_RETRIES,
+        circuit_timeout: float = DELIVERY_CIRCUIT_TIMEOUT
+    ):
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.circuit_timeout = circuit_timeout
+        self.bucket = ThreadSafeTokenBucket(global_rate)
+
+    async def deliver(
+        self,
+        messages: Iterable[Message],
+        on_result: Callable[[Message, bool], None] | None = None
+    ) -> DeliveryReport:
+        report = DeliveryReport()
+        bucket = self.bucket
+        per_chat = KeyedRateLimiter(self.per_chat_interval)
+        # bounded, so a lazy `messages` iterable is only consumed as fast as we send
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        start_time = time.monotonic()
+
+        async with new_async_client() as client:
+            async def worker():
+                while True:
+                    message = await queue.get()
+                    if message is None:
+                        return
+                    ok = await self._send(client, bucket, per_chat, message, report)
+                    if not ok and report.aborted:
+                        # never tried, so leave it for the caller to resume
+                        report.failed += 1
+                        continue
+                    if ok:
+                        report.sent += 1
+                    else:
+                        report.failed += 1
+                    if on_result is not None:
+                        on_result(message, ok)
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                for message in messages:
+                    if report.aborted:
+                        break
+                    await queue.put(message)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+
+        report.elapsed = time.monotonic() - start_time
+        return report
+
+    def run(
+        self,
+        messages: Iterable[Message],
+        on_result: Callable[[Message, bool], None] | None = None
+    ) -> DeliveryReport:
+        # entry point for synchronous callers such as the scheduler thread
+        return asyncio.run(self.deliver(messages, on_result))
+
+    # --- support functions ---
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        bucket: ThreadSafeTokenBucket,
+        per_chat: KeyedRateLimiter,
+        message: Message,
+        report: DeliveryReport
+    ) -> bool:
+        chat_id, text, inline_keyboard = message
+        payload = build_message_payload(chat_id, text, inline_keyboard)
+        attempt = 0
+        circuit_deadline = None
+        while attempt <= self.max_retries:
+            if report.aborted:
+                break
+            await per_chat.acquire(chat_id)
+            await bucket.acquire()
+            try:
+                r = await client.post(f"{BASE_URL}/sendMessage", json=payload)
+            except UpstreamUnavailable as e:
+                # Telegram is failing for everyone; hold every worker until the circuit half-opens.
+                # Nothing was sent, so this does not use up an attempt, but the wait is capped
+                now = time.monotonic()
+                circuit_deadline = circuit_deadline or now + self.circuit_timeout
+                if now >= circuit_deadline:
+                    if not report.aborted:
+                        print(f"Telegram unavailable for {self.circuit_timeout:.0f}s, stopping delivery")
+                    report.aborted = True
+                    break
+                bucket.pause(max(e.retry_in, CIRCUIT_MIN_PAUSE))
+                continue
+            except httpx.HTTPError:
+                await _backoff(attempt)
+                attempt = self._next_attempt(attempt, report)
+                continue
+
+            if r.status_code == 200:
+                per_chat.forget(chat_id)
+                return True
+            if r.status_code == 429:
+                report.rate_limited += 1
+                # pausing the shared bucket holds back every worker, not just this one
+                bucket.pause(_retry_after(r))
+                attempt = self._next_attempt(attempt, report)
+                continue
+            if r.status_code >= 500:
+                await _backoff(attempt)
+                attempt = self._next_attempt(attempt, report)
+                continue
+            # other 4xx (blocked bot, deleted chat, ...) will not succeed on retry
+            break
+
+        per_chat.forget(chat_id)
+        return False
+
+    def _next_attempt(self, attempt: int, report: DeliveryReport) -> int:
+        # counts a retry only when another attempt will actually be made
+        if attempt < self.max_retries:
+            report.retried += 1
+        return attempt + 1
+
+async def _backoff(attempt: int):
+    delay = DELIVERY_BACKOFF * (2 ** attempt)
+    await asyncio.sleep(delay + random.uniform(0, delay))
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        return float(response.headers.get("Retry-After", 1))
@@ -0,0 +1,72 @@
+# services/digest.py
+from functools import lru_cache
+from typing import Iterable, Mapping
+
+from db.database import today_epoch_day
+
+class DigestRenderer:
+    """Renders watchlist digests for one day.
+
+    The text and buttons of each movie are built once and reused for every
+    user tracking it; per user only the numbering is added.
+    """
+    def __init__(self, today_day: int | None = None):
+        self.today_day = today_day if today_day is not None else today_epoch_day()
+        self._fragments: dict[tuple, tuple[str, str, dict]] = {}
+
+    def render(self, header: str, movies: Iterable[Mapping], changed: set[int] | frozenset = frozenset()) -> tuple[str, dict]:
+        parts = [header, "\n\n"]
+        rows = []
+        for number, m in enumerate(movies, 1):
+            body, remove_data, detail_button = self._fragment(m, m["movie_id"] in changed)
+            parts.append(_number_line(number))
+            parts.append(body)
+            rows.append([{"text": _remove_label(number), "callback_data": remove_data}, detail_button])
+        return "".join(parts), {"inline_keyboard": rows}
+
+    # --- support functions ---
+    def _fragment(self, m: Mapping, changed: bool = False) -> tuple[str, str, dict]:
+        key = (m["movie_id"], m["release_date"], m["title"], changed)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            body = f"🎞️ {m['title']}\n📅 {m['release_date']} — {self._countdown(m)}\n"
+            body += "🔄 Release date changed\n\n" if changed else "\n"
+            fragment = self._fragments[key] = (
+                body,
+                f"remove_{m['movie_id']}",
+                {"text": "🔍 More Detail", "callback_data": f"detail_{m['movie_id']}"}
+            )
+        return fragment
+
+    def _countdown(self, m: Mapping) -> str:
+        if m["release_day"] is None:
+            return "❔ Unknown date" if m["release_date"] else "❔ No release date"
+        days_left = m["release_day"] - self.today_day
+        if days_left > 0:
+            return f"⏳ {days_left} day{'s' if days_left > 1 else ''} left"
+        if days_left == 0:
+            return "🎬 Releases today!"
+        return "✅ Already released"
+
+@lru_cache(maxsize=64)
+def _number_line(number: int) -> str:
+    return f"{number}.\n"
+
+@lru_cache(maxsize=64)
+def _remove_label(number: int) -> str:
+    return f"❌ Remove {number}"
+
+# initialize variables
+_renderers: dict[int, DigestRenderer] = {}
+
+def get_renderer(today_day: int | None = None) -> DigestRenderer:
+    # one renderer per day, shared by the reminder job and /watchlist; regions in
+    # different time zones can be on different days, so a couple are kept around
+    if today_day is None:
+        today_day = today_epoch_day()
+    renderer = _renderers.get(today_day)
+    if renderer is None:
+        renderer = _renderers[today_day] = DigestRenderer(today_day)
+        for day in [d for d in _renderers if d < today_day - 1]:
+            del _renderers[day]
+    return renderer
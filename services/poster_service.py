@@ -0,0 +1,60 @@
+# services/poster_service.py
+import asyncio
+import os
+
+import httpx
+
+from db.database import get_database
+from utils.disk_cache_util import DiskLRUCache
+from utils.http_util import get_async_client
+from utils.telegram_util import extract_photo_file_id, is_invalid_file_id, send_photo_async, send_photo_file_async
+
+# initialize settings
+POSTER_DISK_CACHE_DIR = os.getenv("POSTER_DISK_CACHE_DIR")
+POSTER_DISK_CACHE_MB = int(os.getenv("POSTER_DISK_CACHE_MB", "256"))
+POSTER_DOWNLOAD_TIMEOUT = float(os.getenv("POSTER_DOWNLOAD_TIMEOUT", "3"))
+
+# initialize variables
+disk_cache = DiskLRUCache(POSTER_DISK_CACHE_DIR, POSTER_DISK_CACHE_MB * 1024 * 1024) if POSTER_DISK_CACHE_DIR else None
+
+async def send_movie_poster(chat_id: int, movie_id: int, poster_url: str, caption: str):
+    """Send a movie poster, uploading each image to Telegram only once.
+
+    Order of preference: a stored Telegram file_id, bytes from the local
+    disk cache (when enabled), and finally the TMDB URL for Telegram to fetch.
+    """
+    db = get_database()
+    file_id = db.get_poster_file_id(movie_id, poster_url)
+    if file_id:
+        r = await send_photo_async(chat_id, file_id, caption)
+        if not is_invalid_file_id(r):
+            # sent, or failed for a reason (429, blocked bot, 5xx) an upload would not fix
+            return r
+        # Telegram no longer knows this file; forget it and upload again
+        db.delete_poster_file_id(movie_id)
+
+    r = None
+    if disk_cache is not None:
+        image = await _load_poster_bytes(poster_url)
+        if image is not None:
+            r = await send_photo_file_async(chat_id, image, caption)
+    if r is None or r.status_code != 200:
+        r = await send_photo_async(chat_id, poster_url, caption)
+
+    file_id = extract_photo_file_id(r) if r.status_code == 200 else None
+    if file_id:
+        db.set_poster_file_id(movie_id, poster_url, file_id)
+    return r
+
+# --- support functions ---
+async def _load_poster_bytes(poster_url: str) -> bytes | None:
+    image = await asyncio.to_thread(disk_cache.get, poster_url)
+    if image is not None:
+        return image
+    try:
+        response = await get_async_client().get(poster_url, timeout=POSTER_DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return None
+    await asyncio.to_thread(disk_cache.set, poster_url, response.content)
+    return response.content
@@ -0,0 +1,53 @@
+# services/release_refresh.py
+import threading
+
+from db.database import get_database
+from services.tmdb_service import fetch_movie_details
+
+# initialize variables
+_lock = threading.Lock()
+
+def refresh_release_dates(day: int) -> set[int]:
+    """Refresh every tracked movie's release date from TMDB once per day.
+
+    Each movie is fetched once no matter how many users track it. Returns
+    the IDs of movies whose date changed on `day`. The day is only marked as
+    refreshed when every fetch succeeded; otherwise the next shard retries.
+    """
+    db = get_database()
+    with _lock:
+        if db.is_release_refreshed(day):
+            return db.get_changed_movie_ids(day)
+
+        # a day back, so a movie released yesterday still gets its final correction
+        stored = db.get_tracked_release_dates(day - 1)
+        details = fetch_movie_details(stored.keys())
+        changed = set()
+        writes = []
+        failed = 0
+        for movie_id, old_dates in stored.items():
+            movie = details.get(movie_id)
+            if movie is None:
+                failed += 1
+                continue
+            new_date = movie.get("release_date") or ""
+            if not new_date or old_dates == {new_date}:
+                continue
+            writes.append(db.update_release_date(movie_id, new_date))
+            writes.append(db.add_release_change(movie_id, day, ", ".join(sorted(old_dates)), new_date))
+            changed.add(movie_id)
+
+        # reminders read release_day right after this returns, so the new dates must be committed
+        for write in writes:
+            write.result()
+
+        # changes an earlier, incomplete attempt already stored for today
+        changed |= db.get_changed_movie_ids(day)
+        if failed:
+            print(f"Release refresh incomplete: {failed} of {len(stored)} fetches failed, retrying with the next shard")
+            return changed
+
+        db.complete_release_refresh(day, len(stored), len(changed)).result()
+        affected = set().union(*(db.get_movie_trackers(movie_id) for movie_id in changed))
+        print(f"Release refresh: {len(changed)} of {len(stored)} movies changed, affecting {len(affected)} users")
+        return changed
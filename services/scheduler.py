@@ -1,60 +1,297 @@
+import asyncio
+import os
+import threading
 import time
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
-from db.database import Database
-from utils.telegram_util import send_message
+from db.database import EPOCH_ORDINAL, get_database
+from services.catalog_sync import sync_catalog
+from services.delivery import DeliveryEngine, DeliveryReport
+from services.digest import get_renderer
+from services.release_refresh import refresh_release_dates
+from services.tmdb_service import get_genres, warm_cache
+from utils.leader_util import FileLeaderLock
+from utils.metrics_util import registry
 
-db = Database()
+# initialize settings
+REMINDER_WINDOW_DAYS = int(os.getenv("REMINDER_WINDOW_DAYS", "365"))
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", "4"))
+REMINDER_HOUR = int(os.getenv("REMINDER_HOUR", "9"))
+REMINDER_SPREAD_MINUTES = int(os.getenv("REMINDER_SPREAD_MINUTES", "240"))
+REMINDER_MAX_CONCURRENT_SHARDS = int(os.getenv("REMINDER_MAX_CONCURRENT_SHARDS", "2"))
+REMINDER_CHECKPOINT_EVERY = 200
+# days before release on which a reminder goes out even without a date change
+REMINDER_THRESHOLDS = frozenset(int(d) for d in os.getenv("REMINDER_THRESHOLDS", "7,1,0").split(","))
+REGION_TIMEZONES = {
+    "US": "America/New_York",
+    "CA": "America/Toronto",
+}
+REMINDER_RESUME_DELAY = int(os.getenv("REMINDER_RESUME_DELAY", "30"))
+# a shard cut short by a Telegram outage picks up from its checkpoint after this long
+REMINDER_RETRY_DELAY = int(os.getenv("REMINDER_RETRY_DELAY", "600"))
+# every uvicorn worker campaigns, and only the holder of this lock runs the jobs
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", str(Path(__file__).resolve().parent.parent / "db" / "scheduler.lock"))
+SCHEDULER_LEADER_RETRY = int(os.getenv("SCHEDULER_LEADER_RETRY", "15"))
+CATALOG_SYNC_ENABLED = os.getenv("CATALOG_SYNC", os.getenv("TMDB_SERVE_FROM_CATALOG", "0")) == "1"
+CATALOG_SYNC_HOURS = int(os.getenv("CATALOG_SYNC_HOURS", "6"))
+# local hours at which page 1 of each list is refetched, ahead of the evening and morning peaks
+CACHE_WARMUP_HOURS = os.getenv("CACHE_WARMUP_HOURS", "7,17")
+CACHE_WARMUP_DELAY = int(os.getenv("CACHE_WARMUP_DELAY", "60"))
 
-def send_daily_reminders():
-    today = datetime.now().date()
-    users = db.get_all_user_movies() 
+db = get_database()
+delivery_engine = DeliveryEngine()
+leader_lock = FileLeaderLock(SCHEDULER_LOCK_FILE)
+scheduler = BackgroundScheduler(
+    timezone="UTC",
+    executors={
+        "default": ThreadPoolExecutor(4),
+        "reminders": ThreadPoolExecutor(REMINDER_MAX_CONCURRENT_SHARDS)
+    }
+)
 
-    for chat_id in users:
-        tracked = db.get_user_tracked_movies(chat_id)
-        if not tracked:
-            continue
+# initialize variables
+_running: dict[tuple[str, int], dict] = {}
+_running_lock = threading.Lock()
+# caps shards run from any path: cron, resume_missed_shards and send_daily_reminders
+_shard_slots = threading.BoundedSemaphore(REMINDER_MAX_CONCURRENT_SHARDS)
+SHARD_SECONDS = registry.histogram(
+    "reminder_shard_seconds", "Duration of one reminder shard run.", ("region",),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+REMINDER_MESSAGES = registry.counter(
+    "reminder_messages_total", "Reminder messages by delivery outcome.", ("region", "result")
+)
 
-        reply = f'''🎬 Daily Reminder ({today.strftime('%Y-%m-%d')})\n\n'''
-        inline_keyboard = {"inline_keyboard": []}
-        number = 1
+def send_reminder_shard(region: str, shard: int) -> DeliveryReport | None:
+    # sends today's reminders for one (region, shard) unless it already finished today
+    now = datetime.now(_timezone(region))
+    run_date = now.date().isoformat()
+    run = db.get_reminder_run(run_date, region, shard)
+    if run is not None and run["completed_at"]:
+        return None
 
-        for m in tracked:
-            release_date_str = m["release_date"]
-            if not release_date_str:
-                continue
+    progress = _ShardProgress(run_date, region, shard)
+    with _running_lock:
+        # the cron job and resume_missed_shards may race for the same shard
+        if (region, shard) in _running:
+            return None
+        _running[(region, shard)] = progress.status
 
+    start_time = time.perf_counter()
+    try:
+        with _shard_slots:
+            db.start_reminder_run(run_date, region, shard).result()
+            after_chat_id = run["last_chat_id"] if run is not None else None
+            # the first shard of the day does the refresh, later ones reuse its result
+            day = now.date().toordinal() - EPOCH_ORDINAL
             try:
-                release_date = datetime.strptime(release_date_str, "%Y-%m-%d").date()
-                days_left = (release_date - today).days
-            except Exception:
-                days_left = None
-
-            if days_left is None:
-                countdown_text = "❔ Unknown date"
-            elif days_left > 0:
-                countdown_text = f"{days_left} day{'s' if days_left > 1 else ''} left"
-            elif days_left == 0:
-                countdown_text = "🎬 Releases today!"
+                changed = refresh_release_dates(day)
+            except Exception as e:
+                # remind from the stored release dates rather than skip the shard
+                print(f"Release refresh failed for {region}/{shard}: {e}")
+                changed = db.get_changed_movie_ids(day)
+            messages = _generate_reminders(now.date(), region, shard, after_chat_id, changed, progress)
+            report = delivery_engine.run(messages, on_result=progress.record)
+            progress.checkpoint()
+            if report.aborted:
+                _retry_shard(region, shard)
             else:
-                countdown_text = "✅ Already released"
+                db.complete_reminder_run(run_date, region, shard).result()
+    finally:
+        with _running_lock:
+            _running.pop((region, shard), None)
 
-            reply += (
-                f"{number}.\n"
-                f"🎞️ {m['title']}\n"
-                f"📅 {m['release_date']} — {countdown_text}\n\n"
-            )
+    SHARD_SECONDS.observe(time.perf_counter() - start_time, region)
+    REMINDER_MESSAGES.inc(region, "sent", amount=report.sent)
+    REMINDER_MESSAGES.inc(region, "failed", amount=report.failed)
+    REMINDER_MESSAGES.inc(region, "retried", amount=report.retried)
+    REMINDER_MESSAGES.inc(region, "rate_limited", amount=report.rate_limited)
+    print(f"Reminder shard {region}/{shard} ({run_date}): {report.as_dict()}")
+    return report
 
-            inline_keyboard["inline_keyboard"].append([
-                {"text": f"❌ Remove {number}", "callback_data": f"remove_{m['movie_id']}"},
-                {"text": "🔍 More Detail", "callback_data": f"detail_{m['movie_id']}"}
-            ])
-            number += 1
+def send_daily_reminders():
+    # every shard of every region right now; shards finished today are skipped
+    for region in _regions():
+        for shard in range(REMINDER_SHARDS):
+            send_reminder_shard(region, shard)
+
+def resume_missed_shards():
+    # after a restart, run shards whose slot already passed today but never completed
+    for region in _regions():
+        now = datetime.now(_timezone(region))
+        for shard in range(REMINDER_SHARDS):
+            if (now.hour, now.minute) >= _shard_slot(shard):
+                send_reminder_shard(region, shard)
 
-        send_message(chat_id, reply, inline_keyboard)
+def warm_tmdb_cache(regions: list[str] | None = None) -> int:
+    # page 1 of upcoming and of every genre; later pages are rare enough to load on demand
+    regions = regions or _regions()
+    start_time = time.perf_counter()
+    warmed = warm_cache(regions, get_genres())
+    print(f"Warmed {warmed} TMDB pages for {', '.join(regions)} in {time.perf_counter() - start_time:.1f}s")
+    return warmed
+
+def get_reminder_progress() -> dict:
+    progress = {}
+    for region in _regions():
+        run_date = datetime.now(_timezone(region)).date().isoformat()
+        runs = {r["shard"]: r for r in db.get_reminder_runs(run_date) if r["region"] == region}
+        shards = []
+        for shard in range(REMINDER_SHARDS):
+            run = runs.get(shard)
+            with _running_lock:
+                live = dict(_running.get((region, shard), {}))
+            if live:
+                state = "running"
+            elif run is None:
+                state = "pending"
+            else:
+                state = "done" if run["completed_at"] else "interrupted"
+            hour, minute = _shard_slot(shard)
+            shards.append({
+                "shard": shard,
+                "slot": f"{hour:02d}:{minute:02d}",
+                "state": state,
+                "sent": live.get("sent", run["sent"] if run else 0),
+                "failed": live.get("failed", run["failed"] if run else 0)
+            })
+        progress[region] = {"run_date": run_date, "timezone": str(_timezone(region)), "shards": shards}
+    return progress
 
 def start_scheduler():
-    scheduler = BackgroundScheduler(timezone="UTC")
-    scheduler.add_job(send_daily_reminders, "interval", hours=24)
-    send_daily_reminders() 
-    scheduler.start()
\ No newline at end of file
+    for region in _regions():
+        _schedule_region(region)
+    # regions picked by new users get their jobs on the next refresh
+    scheduler.add_job(_refresh_region_jobs, "interval", hours=1)
+    # run dates must be aware: the scheduler reads naive times as UTC
+    # no reminder blast on deploy: only finish what a previous process left undone
+    scheduler.add_job(resume_missed_shards, "date", run_date=datetime.now(timezone.utc) + timedelta(seconds=REMINDER_RESUME_DELAY))
+    if CACHE_WARMUP_HOURS:
+        scheduler.add_job(warm_tmdb_cache, "date", run_date=datetime.now(timezone.utc) + timedelta(seconds=CACHE_WARMUP_DELAY))
+    if CATALOG_SYNC_ENABLED:
+        # first sync runs right away in the scheduler thread
+        scheduler.add_job(sync_catalog, "interval", hours=CATALOG_SYNC_HOURS, next_run_time=datetime.now(timezone.utc))
+    scheduler.start()
+
+async def start_scheduler_when_leader():
+    # waits until this process holds the leader lock; a dead leader's lock is freed by the OS
+    while not leader_lock.try_acquire():
+        await asyncio.sleep(SCHEDULER_LEADER_RETRY)
+    print(f"Process {os.getpid()} is the scheduler leader")
+    await asyncio.to_thread(start_scheduler)
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    leader_lock.release()
+
+# --- support functions ---
+class _ShardProgress:
+    """Counts one shard's deliveries and checkpoints the chat_id up to which every user was handled."""
+    def __init__(self, run_date: str, region: str, shard: int):
+        self.run_date = run_date
+        self.region = region
+        self.shard = shard
+        self.status = {"sent": 0, "failed": 0}
+        self._unsaved = {"sent": 0, "failed": 0}
+        self._pending: deque[int] = deque()
+        self._done: set[int] = set()
+        self._watermark = None
+
+    def produced(self, chat_id: int):
+        self._pending.append(chat_id)
+
+    def record(self, message: tuple, ok: bool):
+        key = "sent" if ok else "failed"
+        self.status[key] += 1
+        self._unsaved[key] += 1
+        # messages finish out of order; only advance past a contiguous done prefix
+        self._done.add(message[0])
+        while self._pending and self._pending[0] in self._done:
+            self._watermark = self._pending.popleft()
+            self._done.discard(self._watermark)
+        if self._unsaved["sent"] + self._unsaved["failed"] >= REMINDER_CHECKPOINT_EVERY:
+            self.checkpoint()
+
+    def checkpoint(self):
+        if self._watermark is None:
+            return
+        db.update_reminder_run(
+            self.run_date, self.region, self.shard, self._watermark, self._unsaved["sent"], self._unsaved["failed"]
+        )
+        self._unsaved = {"sent": 0, "failed": 0}
+
+def _retry_shard(region: str, shard: int):
+    # the run stays incomplete, so the retry starts after the last checkpointed chat
+    print(f"Reminder shard {region}/{shard} stopped early, retrying in {REMINDER_RETRY_DELAY}s")
+    scheduler.add_job(
+        send_reminder_shard, "date", args=(region, shard), executor="reminders",
+        run_date=datetime.now(timezone.utc) + timedelta(seconds=REMINDER_RETRY_DELAY),
+        id=f"reminder_retry_{region}_{shard}", replace_existing=True
+    )
+
+def _generate_reminders(
+    today,
+    region: str,
+    shard: int,
+    after_chat_id: int | None,
+    changed: set[int],
+    progress: _ShardProgress
+):
+    # only movies releasing from today on are read, already sorted by date
+    today_day = today.toordinal() - EPOCH_ORDINAL
+    renderer = get_renderer(today_day)
+    header = f"🎬 Daily Reminder ({today.strftime('%Y-%m-%d')})"
+    rows = db.iter_user_movies(
+        today_day, today_day + REMINDER_WINDOW_DAYS,
+        region=region, shard=(shard, REMINDER_SHARDS), after_chat_id=after_chat_id
+    )
+    for chat_id, tracked in rows:
+        # only users with a changed date or a movie hitting a threshold hear from us
+        relevant = [
+            m for m in tracked
+            if m["movie_id"] in changed or m["release_day"] - today_day in REMINDER_THRESHOLDS
+        ]
+        if not relevant:
+            continue
+        reply, inline_keyboard = renderer.render(header, relevant, changed)
+        progress.produced(chat_id)
+        yield chat_id, reply, inline_keyboard
+
+def _schedule_region(region: str):
+    for shard in range(REMINDER_SHARDS):
+        hour, minute = _shard_slot(shard)
+        scheduler.add_job(
+            send_reminder_shard, "cron", args=[region, shard],
+            hour=hour, minute=minute, timezone=_timezone(region),
+            id=f"reminder_{region}_{shard}", replace_existing=True, executor="reminders",
+            misfire_grace_time=3600, coalesce=True
+        )
+    if CACHE_WARMUP_HOURS:
+        scheduler.add_job(
+            warm_tmdb_cache, "cron", args=[[region]],
+            hour=CACHE_WARMUP_HOURS, timezone=_timezone(region),
+            id=f"warmup_{region}", replace_existing=True,
+            misfire_grace_time=1800, coalesce=True
+        )
+
+def _refresh_region_jobs():
+    for region in _regions():
+        if scheduler.get_job(f"reminder_{region}_0") is None:
+            _schedule_region(region)
+
+def _regions() -> list[str]:
+    return sorted(set(db.get_regions()) | {"US"})
+
+def _timezone(region: str) -> ZoneInfo:
+    return ZoneInfo(REGION_TIMEZONES.get(region, "UTC"))
+
+def _shard_slot(shard: int) -> tuple[int, int]:
+    # local (hour, minute) of a shard, spread evenly over REMINDER_SPREAD_MINUTES
+    offset = REMINDER_HOUR * 60 + shard * REMINDER_SPREAD_MINUTES // max(REMINDER_SHARDS, 1)
+    return (offset // 60) % 24, offset % 60
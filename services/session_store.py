@@ -0,0 +1,128 @@
+# services/session_store.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.worker_util import is_multi_worker
+
+# initialize settings
+# sessions must be visible to every worker once there is more than one
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite" if is_multi_worker() else "memory")
+SESSION_TTL = int(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_DB_FILE = Path(os.getenv("SESSION_DB_FILE", Path(__file__).resolve().parent.parent / "db" / "sessions.db"))
+
+class SessionStore(ABC):
+    """Per-chat browse sessions, e.g. {"ids": [...], "page": 1, "region": "US", "mode": "all"}."""
+    @abstractmethod
+    def get(self, chat_id: int) -> dict | None:
+        ...
+
+    @abstractmethod
+    def set(self, chat_id: int, session: dict):
+        ...
+
+    # for the event loop; stores that may block run in a worker thread
+    async def get_async(self, chat_id: int) -> dict | None:
+        return await asyncio.to_thread(self.get, chat_id)
+
+    async def set_async(self, chat_id: int, session: dict):
+        await asyncio.to_thread(self.set, chat_id, session)
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: int = SESSION_TTL, max_entries: int = SESSION_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chat_id: int) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at <= time.monotonic():
+                del self._entries[chat_id]
+                return None
+            self._entries.move_to_end(chat_id)
+            return session
+
+    def set(self, chat_id: int, session: dict):
+        with self._lock:
+            self._entries[chat_id] = (time.monotonic() + self.ttl, session)
+            self._entries.move_to_end(chat_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_async(self, chat_id: int) -> dict | None:
+        return self.get(chat_id)
+
+    async def set_async(self, chat_id: int, session: dict):
+        self.set(chat_id, session)
+
+class SQLiteSessionStore(SessionStore):
+    """Session store in a SQLite file, so every uvicorn worker sees the same sessions."""
+    PRUNE_EVERY = 100
+
+    def __init__(self, db_path: Path = SESSION_DB_FILE, ttl: int = SESSION_TTL, max_entries: int = SESSION_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS browse_sessions (
+            chat_id INTEGER PRIMARY KEY,
+            data TEXT,
+            expires_at REAL
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_browse_sessions_expires_at ON browse_sessions (expires_at)")
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, chat_id: int) -> dict | None:
+        with self._lock:
+            now = time.time()
+            row = self.conn.execute(
+                "SELECT data, expires_at FROM browse_sessions WHERE chat_id=? AND expires_at>?", (chat_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            # sliding expiry, but only once half the TTL is used up, so most reads don't write
+            if row[1] - now < self.ttl / 2:
+                self.conn.execute(
+                    "UPDATE browse_sessions SET expires_at=? WHERE chat_id=?", (now + self.ttl, chat_id)
+                )
+            return json.loads(row[0])
+
+    def set(self, chat_id: int, session: dict):
+        with self._lock:
+            self.conn.execute("""
+            INSERT INTO browse_sessions (chat_id, data, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(chat_id) DO UPDATE SET data=excluded.data, expires_at=excluded.expires_at
+            """, (chat_id, json.dumps(session, separators=(",", ":")), time.time() + self.ttl))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune()
+
+    # --- support functions ---
+    def _prune(self):
+        self.conn.execute("DELETE FROM browse_sessions WHERE expires_at<=?", (time.time(),))
+        self.conn.execute("""
+        DELETE FROM browse_sessions WHERE chat_id IN (
+            SELECT chat_id FROM browse_sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+        )
+        """, (self.max_entries,))
+
+def create_session_store(kind: str = SESSION_STORE) -> SessionStore:
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    return MemorySessionStore()
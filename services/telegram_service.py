@@ -1,18 +1,33 @@
 # services/telegram_service.py
+import asyncio
 import os
 
-import requests
-from datetime import datetime
+import httpx
 
-from services.tmdb_service import get_upcoming, get_upcoming_by_genre, GENRE_DICT
+from services.tmdb_service import get_genres_async, get_movie_async, get_upcoming_async, get_upcoming_by_genre_async, list_day
 from utils.tmdb_util import find_genre
-from utils.telegram_util import generate_genre_inline_keyboard, send_message, send_photo
-from db.database import Database
+from utils.telegram_util import (
+    TELEGRAM_API_BASE, generate_genre_inline_keyboard, send_message_async, answer_callback_query_async,
+    edit_message_text_async, edit_message_reply_markup_async, is_message_not_modified
+)
+from services.digest import get_renderer
+from services.poster_service import send_movie_poster
+from services.session_store import create_session_store
+from db.database import get_database
+from utils.http_util import request_sync
+from utils.metrics_util import registry
+from utils.movie_util import Movie
+from utils.rate_limit_util import KeyedCoalescer
+from utils.router_util import UpdateRouter
 
 # initialize settings
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-BASE_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
-GENRE_INLINE_KEYBOARD = generate_genre_inline_keyboard(GENRE_DICT) 
+BASE_URL = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}"
+PAGE_SIZE = 5
+LIST_EXPIRED_TEXT = "⚠️ Please type /upcoming or /upcoming_genre again to refresh list."
+PREFETCH_NEXT_PAGE = os.getenv("PREFETCH_NEXT_PAGE", "1") == "1"
+# "Next" presses on one message within this window end up as a single edit
+PAGE_EDIT_WINDOW = int(os.getenv("PAGE_EDIT_WINDOW_MS", "500")) / 1000
 REGION_INLINE_KEYBOARD = {
     "inline_keyboard": [
         [
@@ -23,275 +38,259 @@ REGION_INLINE_KEYBOARD = {
 }
 
 # initialize variables
-db = Database()
-user_movie_cache = {}
+db = get_database()
+session_store = create_session_store()
+_background_tasks: set[asyncio.Task] = set()
+_genre_keyboard: tuple[dict, dict] | None = None
+page_editor = KeyedCoalescer(PAGE_EDIT_WINDOW)
+UPDATE_SECONDS = registry.histogram("telegram_update_seconds", "Time to handle one Telegram update.", ("kind",))
+router = UpdateRouter()
+router.add_timing_hook(lambda name, seconds: UPDATE_SECONDS.observe(seconds, name))
+PAGE_PRESSES = registry.counter("telegram_page_presses_total", "\"Next\" presses, handled or coalesced.", ("result",))
 
 # --- functions ---
-def handle_telegram_update(update: dict):
-    # situation of callback query
+async def handle_telegram_update(update: dict):
     if "callback_query" in update:
-        query = update["callback_query"]
-        chat_id = query["message"]["chat"]["id"]
-        data = query["data"]
-        requests.post(f"{BASE_URL}/answerCallbackQuery", json={
-            "callback_query_id": query["id"]
-        })
-
-        # region choosing
-        if data.startswith("region_"):
-            region = data.split("_")[1]
-            send_message(chat_id, f"Your region is: {region}")
-            db.add_user(chat_id, region)
+        try:
+            await answer_callback_query_async(update["callback_query"]["id"])
+        except httpx.HTTPError as e:
+            # only the button's spinner depends on it; still handle the press
+            print(f"Failed to answer callback query: {e}")
+    await router.dispatch(update)
+
+# --- callback handlers ---
+@router.callback("region")
+async def _on_region(chat_id: int, region: str):
+    await send_message_async(chat_id, f"Your region is: {region}")
+    await asyncio.wrap_future(db.add_user(chat_id, region))
+
+@router.callback("genre")
+async def _on_genre(chat_id: int, genre_id: str):
+    genre = find_genre(await get_genres_async(), genre_id)
+    await send_message_async(chat_id, f"Searching the upcoming movie of {genre}")
+    region_id = db.get_user_region(chat_id) or "US"
+    try:
+        day = list_day()
+        data = await get_upcoming_by_genre_async(genre_id, region_id, day=day)
+        movies = data["movies"]
+        if not movies:
+            await send_message_async(chat_id, "Can't find any upcoming of this genre")
             return
+        session = _new_session(movies, 1, region_id, f"genre_{genre_id}", day)
+        await session_store.set_async(chat_id, session)
+        await _send_local_movie_page(chat_id, movies, start=0, session=session)
+    except Exception as e:
+        await send_message_async(chat_id, f"Failure: {e}")
+
+@router.callback("next", int, with_message_id=True)
+async def _on_next(chat_id: int, start: int, message_id: int):
+    # the list message is edited in place; rapid presses collapse into one edit
+    handled = await page_editor.submit(
+        (chat_id, message_id), start, lambda s: _show_next(chat_id, message_id, s)
+    )
+    PAGE_PRESSES.inc("handled" if handled else "coalesced")
+
+async def _show_next(chat_id: int, message_id: int, start: int):
+    session = await session_store.get_async(chat_id)
+
+    if not session:
+        await send_message_async(chat_id, LIST_EXPIRED_TEXT)
+        return
 
-        # genre choosing
-        elif data.startswith("genre_"):
-            genre_id = data.split("_")[1]
-            genre = find_genre(GENRE_DICT, genre_id)
-            send_message(chat_id, f"Searching the upcoming movie of {genre}")
-            region_id = db.get_user_region(chat_id) or "US"
-            try:
-                data = get_upcoming_by_genre(genre_id, region_id)
-                movies = data["movies"]
-                if not movies:
-                    send_message(chat_id, "Can't find any upcoming of this genre")
-                    return
-                user_movie_cache[chat_id] = {
-                    "movies": movies,
-                    "index": 0,
-                    "page": 1,
-                    "region": region_id,
-                    "mode": f"genre_{genre_id}" 
-                }
-                _send_local_movie_page(chat_id, movies, start=0)
-            except Exception as e:
-                send_message(chat_id, f"Failure: {e}")
-            return
-        
-        # next page
-        elif data.startswith("next_"):
-            start = int(data.split("_")[1])
-            cache = user_movie_cache.get(chat_id)
-
-            if not cache:
-                send_message(chat_id, "⚠️ Please type /upcoming or /upcoming_genre again to refresh list.")
-                return
+    region = session["region"]
+    page = session["page"]
+    mode = session["mode"]
+    day = session.get("day")
 
-            movies = cache["movies"]
-            region = cache["region"]
-            page = cache["page"]
-            mode = cache.get("mode", "all")  
-
-            if start >= len(movies):
-                try:
-                    next_page = page + 1
-
-                    if mode.startswith("genre_"):
-                        genre_id = mode.split("_")[1]
-                        data = get_upcoming_by_genre(genre_id, region, next_page)
-                    else:
-                        data = get_upcoming(region, next_page)
-
-                    new_movies = data["movies"]
-
-                    if not new_movies:
-                        send_message(chat_id, f'''📭 No more upcoming movies available in {region}.''')
-                        return
-
-                    user_movie_cache[chat_id] = {
-                        "movies": new_movies,
-                        "index": 0,
-                        "page": next_page,
-                        "region": region,
-                        "mode": mode
-                    }
-                    send_message(chat_id, f"📄 Loading page {next_page} ...")
-                    _send_local_movie_page(chat_id, new_movies, start=0)
-
-                except Exception as e:
-                    send_message(chat_id, f"❌ Failed to fetch next page: {e}")
+    if start >= len(session["ids"]):
+        try:
+            next_page = page + 1
+            data = await _fetch_movie_page(mode, region, next_page, day)
+            new_movies = data["movies"]
+
+            if not new_movies:
+                # swap the Next button for an end marker on the window being shown
+                movies = await _load_session_movies(session)
+                if movies is None:
+                    await send_message_async(chat_id, LIST_EXPIRED_TEXT)
+                    return
+                _, inline_keyboard = _render_movie_page(movies, max(start - PAGE_SIZE, 0), has_next=False)
+                await edit_message_reply_markup_async(chat_id, message_id, inline_keyboard)
                 return
 
-            _send_local_movie_page(chat_id, movies, start)
-            return
-        
-        elif data.startswith("detail_"):
-            movie_id = int(data.split("_")[1])
-            cache = user_movie_cache.get(chat_id)
-            target = None
+            session = _new_session(new_movies, next_page, region, mode, day)
+            await session_store.set_async(chat_id, session)
+            await _send_local_movie_page(chat_id, new_movies, start=0, session=session, message_id=message_id)
 
-            if cache:
-                target = next((m for m in cache["movies"] if m["id"] == movie_id), None)
-
-            if not target:
-                rows = db.get_user_tracked_movies(chat_id)
-                for row in rows:
-                    if row["movie_id"] == movie_id:
-                        target = {
-                            "id": row["movie_id"],
-                            "title": row["title"],
-                            "release_date": row["release_date"],
-                            "genres": row["genres"].split(", "),
-                            "poster": row["poster"]
-                        }
-                        break
-
-            if not target:
-                send_message(chat_id, "⚠️ Movie not found.")
-                return
+        except Exception as e:
+            await send_message_async(chat_id, f"❌ Failed to fetch next page: {e}")
+        return
 
-            g = ", ".join(target["genres"]) if target.get("genres") else "N/A"
-            caption = (
-                f"🎬 <b>{target['title']}</b>\n"
-                f"📅 {target['release_date']}\n"
-                f"🎭 {g}\n"
-            )
-
-            if target.get("poster"):
-                send_photo(chat_id, target["poster"], caption)
-            else:
-                send_message(chat_id, caption)
-            return
+    try:
+        movies = await _load_session_movies(session)
+    except Exception as e:
+        await send_message_async(chat_id, f"❌ Failed to fetch next page: {e}")
+        return
+    if movies is None:
+        await send_message_async(chat_id, LIST_EXPIRED_TEXT)
+        return
+    await _send_local_movie_page(chat_id, movies, start, session=session, message_id=message_id)
 
-        elif data.startswith("add_"):
-            movie_id = int(data.split("_")[1])
-            cache = user_movie_cache.get(chat_id)
-            if not cache:
-                send_message(chat_id, "⚠️ Please search movies first (/upcoming or /upcoming_genre)")
-                return
+@router.callback("detail", int)
+async def _on_detail(chat_id: int, movie_id: int):
+    session = await session_store.get_async(chat_id)
+    target = None
 
-            movies = cache["movies"]
-            target = next((m for m in movies if m["id"] == movie_id), None)
-            if not target:
-                send_message(chat_id, "⚠️ Movie not found in current list.")
-                return
+    if session and movie_id in session["ids"]:
+        try:
+            movies = await _load_session_movies(session) or []
+            target = next((m for m in movies if m.id == movie_id), None)
+        except Exception:
+            target = None
 
-            try:
-                g = ", ".join(target["genres"]) if target.get("genres") else "N/A"
-                db.add_tracked_movie(
-                    chat_id=chat_id,
-                    movie_id=target["id"],
-                    title=target["title"],
-                    release_date=target.get("release_date", ""),
-                    genres=g,
-                    poster=target.get("poster", "")
-                )
-                send_message(chat_id, f"✅ {target['title']} has been added to your watchlist!")
-            except Exception as e:
-                send_message(chat_id, f"❌ Failed to add movie: {e}")
-            return
+    if not target:
+        row = db.get_tracked_movie(chat_id, movie_id)
+        if row is not None:
+            target = {
+                "id": row.movie_id,
+                "title": row.title,
+                "release_date": row.release_date,
+                "genres": row.genres.split(", "),
+                "poster": row.poster
+            }
 
-        elif data.startswith("remove_"):
-            movie_id = int(data.split("_")[1])
-            try:
-                db.remove_tracked_movie(chat_id, movie_id)
-                send_message(chat_id, "🗑️ The movie has been removed from your watchlist.")
-            except Exception as e:
-                send_message(chat_id, f"❌ Failed to remove movie: {e}")
-            return
+        # stored rows date from when the movie was added, so prefer fresh TMDB data
+        try:
+            target = await get_movie_async(movie_id) or target
+        except Exception:
+            pass
 
-        return 
-    
-    # situation of unknown
-    if "message" not in update:
+    if not target:
+        await send_message_async(chat_id, "⚠️ Movie not found.")
         return
 
-    # situation of message
-    message = update["message"]
-    chat_id = message["chat"]["id"]
-    text = message.get("text", "").strip().lower()
-    if text.startswith("/start"):
-        welcome = (
-            "🎬 Welcome to Movie Tracker Bot!\n"
-            "👇 Please choose your region below\n"
-        )
-        send_message(chat_id, welcome, REGION_INLINE_KEYBOARD)
-        return
+    g = ", ".join(target["genres"]) if target.get("genres") else "N/A"
+    caption = (
+        f"🎬 <b>{target['title']}</b>\n"
+        f"📅 {target['release_date']}\n"
+        f"🎭 {g}\n"
+    )
 
-    elif text.startswith("/help"):
-        help_text = (
-            "📖 Available Commands\n"
-            "/start - Set your region for the upcoming movies\n"
-            "/upcoming - View upcoming movie releases\n"
-            "/upcoming_genre - View upcoming movies releases by genre\n"
-            "/about - Learn more about the author\n"
-        )
-        send_message(chat_id, help_text)
-        return
+    if target.get("poster"):
+        await send_movie_poster(chat_id, target["id"], target["poster"], caption)
+    else:
+        await send_message_async(chat_id, caption)
 
-    elif text.startswith("/about"):
-        about_text = (
-            "👨‍💻 Developer: https://www.kylekao.dev/\n"
-            "💬 Feel free to chat or share feedback!\n"
-            "📬 Telegram: @kylekao0322"
-        )
-        send_message(chat_id, about_text)
+@router.callback("add", int)
+async def _on_add(chat_id: int, movie_id: int):
+    session = await session_store.get_async(chat_id)
+    if not session:
+        await send_message_async(chat_id, "⚠️ Please search movies first (/upcoming or /upcoming_genre)")
         return
 
-    elif text.startswith("/upcoming_genre"):
-        send_message(chat_id, "👇 Select your preferred movie genre", inline_keyboard=GENRE_INLINE_KEYBOARD)
+    target = None
+    if movie_id in session["ids"]:
+        try:
+            movies = await _load_session_movies(session)
+        except Exception:
+            movies = []
+        if movies is None:
+            await send_message_async(chat_id, LIST_EXPIRED_TEXT)
+            return
+        target = next((m for m in movies if m.id == movie_id), None)
+    if not target:
+        await send_message_async(chat_id, "⚠️ Movie not found in current list.")
         return
 
-    elif text.startswith("/upcoming"):
-        send_message(chat_id, "🔍 Searching current upcoming movies")
-        region = db.get_user_region(chat_id) or "US"
-        try:
-            data = get_upcoming(region)
-            movies = data["movies"]
-            if not movies:
-                send_message(chat_id, "Sorry. There is no upcoming movies")
-                return
-            user_movie_cache[chat_id] = {
-                "movies": movies,   
-                "index": 0,         
-                "page": 1,        
-                "region": region
-            }
-            _send_local_movie_page(chat_id, movies, start=0)
-        except Exception as e:
-            send_message(chat_id, f"Failure: {e}")
+    try:
+        genres = target.genres
+        g = ", ".join(genres) if genres else "N/A"
+        await asyncio.wrap_future(db.add_tracked_movie(
+            chat_id=chat_id,
+            movie_id=target.id,
+            title=target.title,
+            release_date=target.release_date,
+            genres=g,
+            poster=target.poster
+        ))
+        await send_message_async(chat_id, f"✅ {target.title} has been added to your watchlist!")
+    except Exception as e:
+        await send_message_async(chat_id, f"❌ Failed to add movie: {e}")
+
+@router.callback("remove", int)
+async def _on_remove(chat_id: int, movie_id: int):
+    try:
+        await asyncio.wrap_future(db.remove_tracked_movie(chat_id, movie_id))
+        await send_message_async(chat_id, "🗑️ The movie has been removed from your watchlist.")
+    except Exception as e:
+        await send_message_async(chat_id, f"❌ Failed to remove movie: {e}")
+
+# --- command handlers ---
+@router.command("/start")
+async def _on_start(chat_id: int, args: str):
+    welcome = (
+        "🎬 Welcome to Movie Tracker Bot!\n"
+        "👇 Please choose your region below\n"
+    )
+    await send_message_async(chat_id, welcome, REGION_INLINE_KEYBOARD)
+
+@router.command("/help")
+async def _on_help(chat_id: int, args: str):
+    help_text = (
+        "📖 Available Commands\n"
+        "/start - Set your region for the upcoming movies\n"
+        "/upcoming - View upcoming movie releases\n"
+        "/upcoming_genre - View upcoming movies releases by genre\n"
+        "/about - Learn more about the author\n"
+    )
+    await send_message_async(chat_id, help_text)
+
+@router.command("/about")
+async def _on_about(chat_id: int, args: str):
+    about_text = (
+        "👨‍💻 Developer: https://www.kylekao.dev/\n"
+        "💬 Feel free to chat or share feedback!\n"
+        "📬 Telegram: @kylekao0322"
+    )
+    await send_message_async(chat_id, about_text)
+
+@router.command("/upcoming_genre")
+async def _on_upcoming_genre(chat_id: int, args: str):
+    genres = await get_genres_async()
+    if not genres:
+        await send_message_async(chat_id, "⚠️ Genres are not available right now. Please try again later.")
         return
-    
-    elif text.startswith("/watchlist"):
-        tracked = db.get_user_tracked_movies(chat_id)
-        if not tracked:
-            send_message(chat_id, "📭 Your watchlist is empty.")
+    await send_message_async(chat_id, "👇 Select your preferred movie genre", inline_keyboard=_genre_inline_keyboard(genres))
+
+@router.command("/upcoming")
+async def _on_upcoming(chat_id: int, args: str):
+    await send_message_async(chat_id, "🔍 Searching current upcoming movies")
+    region = db.get_user_region(chat_id) or "US"
+    try:
+        day = list_day()
+        data = await get_upcoming_async(region, day=day)
+        movies = data["movies"]
+        if not movies:
+            await send_message_async(chat_id, "Sorry. There is no upcoming movies")
             return
-        reply = "🎬 Your Watchlist\n\n"
-        inline_keyboard = {"inline_keyboard": []}
-        number = 1
-        today = datetime.now().date()
-        for m in tracked:
-            release_date_str = m["release_date"]
-            if release_date_str:
-                try:
-                    release_date = datetime.strptime(release_date_str, "%Y-%m-%d").date()
-                    days_left = (release_date - today).days
-                    if days_left > 0:
-                        countdown_text = f"⏳ {days_left} day{'s' if days_left > 1 else ''} left"
-                    elif days_left == 0:
-                        countdown_text = "🎬 Releases today!"
-                    else:
-                        countdown_text = "✅ Already released"
-                except Exception:
-                    countdown_text = "❔ Unknown date"
-            else:
-                countdown_text = "❔ No release date"
-            reply += (
-                f"{number}.\n"
-                f"🎞️ {m['title']}\n"
-                f"📅 {m['release_date']} — {countdown_text}\n\n"
-            )
-            inline_keyboard["inline_keyboard"].append([
-                {"text": f"❌ Remove {number}", "callback_data": f"remove_{m['movie_id']}"},
-                {"text": "🔍 More Detail", "callback_data": f"detail_{m['movie_id']}"}
-            ])
-            number += 1
-        send_message(chat_id, reply, inline_keyboard)
+        session = _new_session(movies, 1, region, "all", day)
+        await session_store.set_async(chat_id, session)
+        await _send_local_movie_page(chat_id, movies, start=0, session=session)
+    except Exception as e:
+        await send_message_async(chat_id, f"Failure: {e}")
+
+@router.command("/watchlist")
+async def _on_watchlist(chat_id: int, args: str):
+    tracked = db.get_user_tracked_movies(chat_id)
+    if not tracked:
+        await send_message_async(chat_id, "📭 Your watchlist is empty.")
         return
-        
-    else:
-        send_message(chat_id, "Sorry, I don’t recognize that command. Try /help to see what I can do!")
+    reply, inline_keyboard = get_renderer().render("🎬 Your Watchlist", tracked)
+    await send_message_async(chat_id, reply, inline_keyboard)
+
+@router.fallback
+async def _on_unknown(chat_id: int, text: str):
+    await send_message_async(chat_id, "Sorry, I don’t recognize that command. Try /help to see what I can do!")
 
 def set_bot_commands():
     commands = [
@@ -302,10 +301,80 @@ def set_bot_commands():
         {"command": "watchlist", "description": "show all your upcoming movie tracking"},
         {"command": "about", "description": "the detailed information of the developer"},
     ]
-    r = requests.post(f"{BASE_URL}/setMyCommands", json={"commands": commands})
+    r = request_sync("POST", f"{BASE_URL}/setMyCommands", json={"commands": commands})
+
+def _genre_inline_keyboard(genres: dict) -> dict:
+    # rebuilt only when the genre cache swaps in a new map
+    global _genre_keyboard
+    if _genre_keyboard is None or _genre_keyboard[0] is not genres:
+        _genre_keyboard = (genres, generate_genre_inline_keyboard(genres))
+    return _genre_keyboard[1]
+
+def _new_session(movies: list[Movie], page: int, region: str, mode: str, day: str | None) -> dict:
+    # only IDs are kept per chat; the movies themselves live in the shared TMDB cache
+    return {
+        "ids": [m.id for m in movies],
+        "page": page,
+        "region": region,
+        "mode": mode,
+        # the list's cache key, so the same page is found after midnight
+        "day": day
+    }
+
+async def _fetch_movie_page(mode: str, region: str, page: int, day: str | None = None) -> dict:
+    if mode.startswith("genre_"):
+        genre_id = mode.split("_")[1]
+        return await get_upcoming_by_genre_async(genre_id, region, page, day)
+    return await get_upcoming_async(region, page, day)
+
+async def _load_session_movies(session: dict) -> list[Movie] | None:
+    # the session's movies in its order; None when the list can no longer be rebuilt
+    data = await _fetch_movie_page(session["mode"], session["region"], session["page"], session.get("day"))
+    by_id = {m.id: m for m in data["movies"]}
+    # a re-fetched page may have shifted; look the missing ones up by ID
+    missing = [movie_id for movie_id in session["ids"] if movie_id not in by_id]
+    for movie in await asyncio.gather(*(get_movie_async(movie_id) for movie_id in missing)):
+        if movie is not None:
+            by_id[movie.id] = movie
+    if any(movie_id not in by_id for movie_id in session["ids"]):
+        return None
+    return [by_id[movie_id] for movie_id in session["ids"]]
+
+async def _prefetch_movie_page(mode: str, region: str, page: int, day: str | None = None):
+    try:
+        await _fetch_movie_page(mode, region, page, day)
+    except Exception as e:
+        print(f"Failed to prefetch {mode} page {page} for {region}: {e}")
+
+async def _send_local_movie_page(
+    chat_id: int,
+    movies: list[Movie],
+    start: int,
+    session: dict | None = None,
+    message_id: int | None = None
+):
+    # with `message_id` the page replaces that message's content instead of arriving as a new one
+    page_size = PAGE_SIZE
+
+    # on the last window of this TMDB page, warm the cache with the next one
+    if PREFETCH_NEXT_PAGE and session and start + page_size >= len(movies):
+        task = asyncio.create_task(
+            _prefetch_movie_page(session["mode"], session["region"], session["page"] + 1, session.get("day"))
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
-def _send_local_movie_page(chat_id: int, movies: dict, start: int):
-    page_size = 5
+    reply, inline_keyboard = _render_movie_page(movies, start)
+    if message_id is not None:
+        response = await edit_message_text_async(chat_id, message_id, reply, inline_keyboard)
+        if response.is_success or is_message_not_modified(response):
+            return
+        # e.g. the message was deleted; fall back to a new one
+        print(f"Failed to edit message {message_id} in chat {chat_id}: {response.text}")
+    await send_message_async(chat_id, reply, inline_keyboard)
+
+def _render_movie_page(movies: list[Movie], start: int, has_next: bool = True) -> tuple[str, dict]:
+    page_size = PAGE_SIZE
     sliced = movies[start:start + page_size]
 
     reply = f"🎬 Upcoming Movies\n\n"
@@ -313,20 +382,25 @@ def _send_local_movie_page(chat_id: int, movies: dict, start: int):
 
     number = 1
     for m in sliced:
-        g = ", ".join(m["genres"]) if m.get("genres") else "N/A"
+        genres = m.genres
+        g = ", ".join(genres) if genres else "N/A"
         reply += (
             f"{number}.\n"
-            f"🎞️ {m['title']}\n"
-            f"📅 {m['release_date']}\n"
+            f"🎞️ {m.title}\n"
+            f"📅 {m.release_date}\n"
             f"🎭 {g}\n\n"
         )
         inline_keyboard["inline_keyboard"].append([
-            {"text": f"⭐ Add {number}", "callback_data": f"add_{m["id"]}"},
-            {"text": "🔍 More detail", "callback_data": f"detail_{m['id']}"}
+            {"text": f"⭐ Add {number}", "callback_data": f"add_{m.id}"},
+            {"text": "🔍 More detail", "callback_data": f"detail_{m.id}"}
         ])
         number += 1
-    inline_keyboard["inline_keyboard"].append([
-        {"text": "➡ Next", "callback_data": f"next_{start + page_size}"}
-    ])
-
-    send_message(chat_id, reply, inline_keyboard)
\ No newline at end of file
+    if has_next:
+        inline_keyboard["inline_keyboard"].append([
+            {"text": "➡ Next", "callback_data": f"next_{start + page_size}"}
+        ])
+    else:
+        inline_keyboard["inline_keyboard"].append([
+            {"text": "📭 No more movies", "callback_data": "end"}
+        ])
+    return reply, inline_keyboard
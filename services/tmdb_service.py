@@ -1,47 +1,220 @@
 # services/tmdb_service.py
+import asyncio
 import os
-import time
 
-import requests
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from fastapi import APIRouter, Query
+from typing import AsyncIterator, Iterable
 
-from utils.tmdb_util import load_genre, find_genre 
+import httpx
+
+from db.catalog import get_catalog
+from db.database import to_epoch_day
+from db.shared_cache import get_shared_cache
+from utils.cache_util import TTLCache
+from utils.http_util import get_async_client, new_async_client, request_sync
+from utils.metrics_util import register_cache, register_upstream, registry
+from utils.movie_util import IMAGE_BASE, Movie, interned_movie_count, movie_from_dict, movie_from_tmdb, set_genre_lookup
+from utils.rate_limit_util import TokenBucket
+from utils.worker_util import is_multi_worker
+from utils.tmdb_util import GenreCache
 
 # initialize settings
 BEARER = os.getenv("TMDB_BEARER_TOKEN")
-IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
-GENRE_FILE = "./genres.json"
-GENRE_DICT = load_genre(GENRE_FILE, BEARER)
+TMDB_API_BASE = os.getenv("TMDB_API_BASE", "https://api.themoviedb.org/3")
+GENRE_FILE = os.getenv("GENRE_FILE", "./genres.json")
+GENRE_TTL = int(os.getenv("TMDB_GENRE_TTL", str(7 * 24 * 3600)))
+GENRE_WAIT_TIMEOUT = 5
+CACHE_TTL = int(os.getenv("TMDB_CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("TMDB_CACHE_MAX_ENTRIES", "512"))
+# how long past expiry a result may still be served while TMDB is failing
+CACHE_STALE_TTL = int(os.getenv("TMDB_CACHE_STALE_TTL", str(6 * 3600)))
+# how long past expiry a result is served instantly while it is refreshed in the background
+CACHE_REVALIDATE_TTL = int(os.getenv("TMDB_CACHE_REVALIDATE_TTL", "1800"))
+# with several uvicorn workers, responses are also shared through SQLite
+SHARED_CACHE = os.getenv("TMDB_SHARED_CACHE", "1" if is_multi_worker() else "0") == "1"
+SERVE_FROM_CATALOG = os.getenv("TMDB_SERVE_FROM_CATALOG", "0") == "1"
+TMDB_RATE_LIMIT = float(os.getenv("TMDB_RATE_LIMIT", "40"))
+DETAIL_CONCURRENCY = int(os.getenv("TMDB_DETAIL_CONCURRENCY", "16"))
+# only 429s are retried here; the HTTP transport already retries errors and 5xx
+DETAIL_MAX_RETRIES = 3
+# single detail views, kept apart so bulk refreshes cannot evict list pages
+DETAIL_CACHE_TTL = int(os.getenv("TMDB_DETAIL_CACHE_TTL", "3600"))
+DETAIL_CACHE_MAX_ENTRIES = int(os.getenv("TMDB_DETAIL_CACHE_MAX_ENTRIES", "512"))
+
+# initialize variables
+response_cache = TTLCache(
+    ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, stale_ttl=CACHE_STALE_TTL, revalidate_ttl=CACHE_REVALIDATE_TTL
+)
+shared_cache = get_shared_cache() if SHARED_CACHE else None
+genre_cache = GenreCache(GENRE_FILE, BEARER, TMDB_API_BASE, GENRE_TTL)
+set_genre_lookup(genre_cache.get)
+detail_cache = TTLCache(ttl=DETAIL_CACHE_TTL, max_entries=DETAIL_CACHE_MAX_ENTRIES)
+register_cache("tmdb", response_cache.stats)
+register_cache("tmdb_detail", detail_cache.stats)
+register_upstream("tmdb", TMDB_API_BASE)
+register_upstream("tmdb_image", IMAGE_BASE)
+LOOKUP_SECONDS = registry.histogram(
+    "tmdb_lookup_seconds", "Time to serve a TMDB movie list, cache hits included.", ("kind",)
+)
+registry.gauge("movies_interned", "Distinct Movie records alive in this process.", (), lambda: {(): interned_movie_count()})
 
 # --- functions ---
 def check_validation() -> None:
-    url = "https://api.themoviedb.org/3/authentication"
+    url = f"{TMDB_API_BASE}/authentication"
     headers = {
         "accept": "application/json",
         "Authorization": f'''Bearer {BEARER}'''
     }
-    response = requests.get(url, headers=headers)
+    response = request_sync("GET", url, headers=headers)
     print(response.text)
 
-def get_upcoming(region: str = "US", page: int = 1) -> dict:
-    start_time = time.time()
-    url = "https://api.themoviedb.org/3/movie/upcoming"
+def get_genres() -> dict:
+    # genre id -> name; may be empty right after a first deploy while TMDB is fetched
+    return genre_cache.get()
+
+def fetch_upcoming_results(region: str, page: int = 1) -> dict:
+    # raw TMDB response, used by the catalog sync
+    _, url, params = _upcoming_request(region, page)
+    return _make_request(url, params)
+
+def fetch_discover_results(region: str, page: int = 1, genre_id: str | None = None) -> dict:
+    _, url, params = _genre_request(genre_id, region, page)
+    return _make_request(url, params)
+
+def list_day() -> str:
+    # the day movie lists are keyed on; browse sessions keep it to reopen the same list
+    return datetime.today().date().isoformat()
+
+def discover_window(day: str | None = None) -> tuple[str, str]:
+    # release date range of the genre lists: `day` (default today) and the next 30 days
+    start = date.fromisoformat(day or list_day())
+    return start.strftime("%Y-%m-%d"), (start + timedelta(days=30)).strftime("%Y-%m-%d")
+
+def fetch_movie_details(movie_ids: Iterable[int], concurrency: int = DETAIL_CONCURRENCY) -> dict[int, dict | None]:
+    # blocking wrapper for background threads, which run their own event loop and client
+    async def collect():
+        async with new_async_client() as client:
+            return {
+                movie_id: details
+                async for movie_id, details in fetch_movie_details_async(movie_ids, concurrency, client)
+            }
+    return asyncio.run(collect())
+
+def warm_cache(regions: Iterable[str], genre_ids: Iterable[int], concurrency: int = DETAIL_CONCURRENCY) -> int:
+    """Re-fetch page 1 of upcoming and of every genre for each region.
+
+    Run ahead of peak hours so users find fresh entries. Returns the number
+    of pages refreshed; failures keep whatever the cache already had.
+    """
+    pages = []
+    for region in regions:
+        pages.append(_upcoming_request(region, 1))
+        pages.extend(_genre_request(str(genre_id), region, 1) for genre_id in genre_ids)
+
+    async def warm() -> int:
+        bucket = TokenBucket(TMDB_RATE_LIMIT)
+        semaphore = asyncio.Semaphore(concurrency)
+        async with new_async_client() as client:
+            async def refresh(key: tuple, url: str, params: dict) -> bool:
+                async with semaphore:
+                    results = _catalog_results(params)
+                    if results is None:
+                        await bucket.acquire()
+                        try:
+                            response = await client.get(url, headers=_headers(), params=params)
+                            response.raise_for_status()
+                        except httpx.HTTPError as e:
+                            print(f"Failed to warm {key}: {e}")
+                            return False
+                        results = response.json().get("results", [])
+                movies = _process_movies(results)
+                response_cache.set(key, movies)
+                if shared_cache is not None:
+                    await asyncio.to_thread(_share_movies, key, movies)
+                return True
+            return sum(await asyncio.gather(*(refresh(*request) for request in pages)))
+    return asyncio.run(warm())
+
+# --- async functions ---
+async def get_genres_async() -> dict:
+    # like get_genres, but waits (off the event loop) for the first fetch when nothing is on disk
+    return genre_cache.get() or await asyncio.to_thread(genre_cache.wait, GENRE_WAIT_TIMEOUT)
+
+async def get_upcoming_async(region: str = "US", page: int = 1, day: str | None = None) -> dict:
+    key, url, params = _upcoming_request(region, page, day)
+    with LOOKUP_SECONDS.time("upcoming"):
+        movies = await response_cache.get_or_load_async(key, lambda: _fetch_movies_async(key, url, params))
+    return {"movies": movies}
+
+async def get_upcoming_by_genre_async(genre_id: str, region: str = "US", page: int = 1, day: str | None = None) -> dict:
+    key, url, params = _genre_request(genre_id, region, page, day)
+    with LOOKUP_SECONDS.time("genre"):
+        movies = await response_cache.get_or_load_async(key, lambda: _fetch_movies_async(key, url, params))
+    return {"movies": movies}
+
+async def get_movie_details_async(movie_id: int) -> dict | None:
+    # a single detail view, served from the detail cache when fresh
+    details = detail_cache.get(movie_id)
+    if details is None:
+        details = await _fetch_movie_detail_async(get_async_client(), None, movie_id)
+        if details is not None:
+            detail_cache.set(movie_id, details)
+    return details
+
+async def get_movie_async(movie_id: int) -> Movie | None:
+    details = await get_movie_details_async(movie_id)
+    return _process_movies([details])[0] if details else None
+
+async def fetch_movie_details_async(
+    movie_ids: Iterable[int],
+    concurrency: int = DETAIL_CONCURRENCY,
+    client: httpx.AsyncClient | None = None
+) -> AsyncIterator[tuple[int, dict | None]]:
+    """Fetch /movie/{id} for many movies concurrently.
+
+    IDs are deduplicated, at most `concurrency` requests are in flight and the
+    request rate stays under TMDB_RATE_LIMIT. Results are not cached, so a
+    refresh of every tracked movie leaves the caches alone. They are yielded as
+    (movie_id, details) in completion order; details is None when the fetch
+    failed and empty when TMDB no longer has the movie.
+    """
+    client = client or get_async_client()
+    bucket = TokenBucket(TMDB_RATE_LIMIT)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(movie_id: int) -> tuple[int, dict | None]:
+        async with semaphore:
+            try:
+                return movie_id, await _fetch_movie_detail_async(client, bucket, movie_id)
+            except (httpx.HTTPError, ValueError) as e:
+                # one bad movie must not cancel the rest of the stream
+                print(f"Failed to fetch movie {movie_id}: {e}")
+                return movie_id, None
+
+    tasks = [asyncio.create_task(fetch(movie_id)) for movie_id in dict.fromkeys(int(i) for i in movie_ids)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+# --- support functions ---
+def _upcoming_request(region: str, page: int, day: str | None = None) -> tuple[tuple, str, dict]:
+    url = f"{TMDB_API_BASE}/movie/upcoming"
     params = {
         "language": "en-US",
         "region": region,
         "page": page
     }
-    data = _make_request(url, params)
-    movies = _process_movies(data.get("results", []))
-    elapsed = round(time.time() - start_time, 3)
-    return {"elapsed": elapsed, "movies": movies}
-
-def get_upcoming_by_genre(genre_id: str, region: str = "US", page: int = 1) -> dict:
-    start_time = time.time()
-    url = "https://api.themoviedb.org/3/discover/movie"
-    today = datetime.today().date()
-    today_after_one_month = today + timedelta(days=30)
+    # upcoming has no explicit window, so key on the day to roll over with it
+    key = ("upcoming", region, None, page, day or list_day())
+    return key, url, params
+
+def _genre_request(genre_id: str | None, region: str, page: int, day: str | None = None) -> tuple[tuple, str, dict]:
+    url = f"{TMDB_API_BASE}/discover/movie"
+    window_start, window_end = discover_window(day)
     params = {
         "with_genres": genre_id,
         "region": region,
@@ -49,38 +222,106 @@ def get_upcoming_by_genre(genre_id: str, region: str = "US", page: int = 1) -> d
         "include_video": "false",
         "language": "en-US",
         "sort_by": "release_date.asc",
-        "sort_by": "release_date.asc",
-        "release_date.gte": today.strftime("%Y-%m-%d"),
-        "release_date.lte": today_after_one_month.strftime("%Y-%m-%d"),
+        "release_date.gte": window_start,
+        "release_date.lte": window_end,
         "with_release_type": "2|3",
         "page": page
     }
-    data = _make_request(url, params)
-    movies = _process_movies(data.get("results", []))
-    elapsed = round(time.time() - start_time, 3)
-    return {"elapsed": elapsed, "movies": movies}
+    if genre_id is None:
+        del params["with_genres"]
+    key = ("discover", region, str(genre_id), page, (params["release_date.gte"], params["release_date.lte"]))
+    return key, url, params
 
-# --- support functions ---
-def _make_request(url: str, params: dict = None) -> dict:
-    headers = {
+def _catalog_results(params: dict) -> list[dict] | None:
+    # served from the local mirror when enabled; None falls back to a live call
+    if not SERVE_FROM_CATALOG:
+        return None
+    catalog = get_catalog()
+    if "with_genres" not in params:
+        return catalog.get_upcoming(params["region"], params["page"])
+    return catalog.get_by_genre(
+        int(params["with_genres"]),
+        params["region"],
+        to_epoch_day(params["release_date.gte"]),
+        to_epoch_day(params["release_date.lte"]),
+        params["page"]
+    )
+
+def _headers() -> dict:
+    return {
         "accept": "application/json",
         "Authorization": f"Bearer {BEARER}"
     }
-    response = requests.get(url, headers=headers, params=params)
+
+def _make_request(url: str, params: dict = None) -> dict:
+    response = request_sync("GET", url, headers=_headers(), params=params)
+    response.raise_for_status()
+    return response.json()
+
+async def _make_request_async(url: str, params: dict = None) -> dict:
+    response = await get_async_client().get(url, headers=_headers(), params=params)
     response.raise_for_status()
     return response.json()
 
-def _process_movies(results: list[dict]) -> list[dict]:
-    movies = []
-    for movie in results:
-        movie_genres = []
-        for genre_id in movie.get("genre_ids", []):
-            movie_genres.append(find_genre(GENRE_DICT, genre_id))
-        movies.append({
-            "id": movie.get("id", ""),
-            "title": movie.get("title", ""),
-            "release_date": movie.get("release_date", ""),
-            "genres": movie_genres,
-            "poster": f"{IMAGE_BASE}{movie.get('poster_path', '')}",
-        })
-    return movies
\ No newline at end of file
+async def _fetch_movie_detail_async(client: httpx.AsyncClient, bucket: TokenBucket | None, movie_id: int) -> dict | None:
+    url = f"{TMDB_API_BASE}/movie/{movie_id}"
+    for _ in range(DETAIL_MAX_RETRIES):
+        if bucket is not None:
+            await bucket.acquire()
+        try:
+            response = await client.get(url, headers=_headers(), params={"language": "en-US"})
+        except httpx.HTTPError as e:
+            print(f"Failed to fetch movie {movie_id}: {e}")
+            return None
+        if response.status_code == 429:
+            # TMDB asks us to slow down; hold back every request sharing the bucket
+            retry_after = float(response.headers.get("Retry-After", 1))
+            if bucket is not None:
+                bucket.pause(retry_after)
+            else:
+                await asyncio.sleep(retry_after)
+            continue
+        if response.status_code == 404:
+            return {}
+        if response.status_code != 200:
+            # 5xx, or a 401/403 from a bad token: retrying here would not help
+            print(f"Failed to fetch movie {movie_id}: HTTP {response.status_code}")
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            print(f"Failed to fetch movie {movie_id}: invalid JSON")
+            return None
+    return None
+
+async def _fetch_movies_async(key: tuple, url: str, params: dict) -> list[Movie]:
+    # another worker may already have fetched this page
+    if shared_cache is not None:
+        movies = await asyncio.to_thread(_shared_movies, key)
+        if movies is not None:
+            return movies
+    results = _catalog_results(params)
+    if results is None:
+        data = await _make_request_async(url, params)
+        results = data.get("results", [])
+    movies = _process_movies(results)
+    if shared_cache is not None:
+        await asyncio.to_thread(_share_movies, key, movies)
+    return movies
+
+def _shared_movies(key: tuple) -> list[Movie] | None:
+    data = shared_cache.get(key)
+    if data is None:
+        return None
+    try:
+        return [movie_from_dict(d) for d in data]
+    except KeyError:
+        # written by a release that still stored plain dicts
+        return None
+
+def _share_movies(key: tuple, movies: list[Movie]):
+    shared_cache.set(key, [m.as_dict() for m in movies], CACHE_TTL)
+
+def _process_movies(results: list[dict]) -> list[Movie]:
+    # one interned record per movie_id, whichever page or session it shows up in
+    return [movie_from_tmdb(movie) for movie in results]
@@ -0,0 +1,117 @@
+# services/update_queue.py
+import asyncio
+import os
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable
+
+# initialize settings
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", "1000"))
+UPDATE_DEDUP_SIZE = int(os.getenv("UPDATE_DEDUP_SIZE", "10000"))
+UPDATE_DRAIN_TIMEOUT = float(os.getenv("UPDATE_DRAIN_TIMEOUT", "20"))
+
+class UpdateQueue:
+    """Bounded in-process queue that handles Telegram updates in the background.
+
+    Any worker can take any chat, but a chat has at most one update in
+    progress: updates arriving meanwhile wait in that chat's backlog and
+    go back to the shared queue one at a time. Updates of the same chat are
+    handled in order, and a slow update only holds up its own chat.
+    """
+    def __init__(
+        self,
+        handler: Callable[[dict], Awaitable[None]],
+        workers: int = UPDATE_WORKERS,
+        max_size: int = UPDATE_QUEUE_SIZE,
+        dedup_size: int = UPDATE_DEDUP_SIZE
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.dedup_size = dedup_size
+        self.closing = False
+        self._ready: asyncio.Queue | None = None
+        # chat_id -> updates waiting behind the one queued or in progress
+        self._backlogs: dict[int, deque] = {}
+        self._size = 0
+        self._idle: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._seen: OrderedDict[int, None] = OrderedDict()
+
+    def start(self):
+        self.closing = False
+        self._ready = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = UPDATE_DRAIN_TIMEOUT):
+        # updates were already acknowledged to Telegram, so finish them before exiting
+        self.closing = True
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Dropping {self._size} updates still queued after {timeout}s")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, update: dict) -> bool:
+        # returns False when the update has to be retried later
+        update_id = update.get("update_id")
+        if update_id is not None and update_id in self._seen:
+            return True
+        if self.closing or self._size >= self.max_size:
+            return False
+
+        chat_id = _chat_id(update)
+        self._size += 1
+        self._idle.clear()
+        if chat_id is not None and chat_id in self._backlogs:
+            self._backlogs[chat_id].append(update)
+        else:
+            if chat_id is not None:
+                self._backlogs[chat_id] = deque()
+            self._ready.put_nowait((chat_id, update))
+
+        if update_id is not None:
+            self._seen[update_id] = None
+            if len(self._seen) > self.dedup_size:
+                self._seen.popitem(last=False)
+        return True
+
+    def qsize(self) -> int:
+        return self._size
+
+    async def join(self):
+        # waits until the queue has no update left to handle
+        await self._idle.wait()
+
+    # --- support functions ---
+    async def _work(self):
+        while True:
+            chat_id, update = await self._ready.get()
+            try:
+                await self.handler(update)
+            except Exception as e:
+                print(f"Failed to handle update {update.get('update_id')}: {e}")
+            finally:
+                self._done(chat_id)
+
+    def _done(self, chat_id: int | None):
+        self._size -= 1
+        if chat_id is not None:
+            backlog = self._backlogs[chat_id]
+            if backlog:
+                # back of the shared queue, so busy chats don't starve the others
+                self._ready.put_nowait((chat_id, backlog.popleft()))
+            else:
+                del self._backlogs[chat_id]
+        if self._size == 0:
+            self._idle.set()
+
+def _chat_id(update: dict) -> int | None:
+    if "callback_query" in update:
+        return update["callback_query"].get("message", {}).get("chat", {}).get("id")
+    return update.get("message", {}).get("chat", {}).get("id")
@@ -0,0 +1,154 @@
+# utils/cache_util.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+class TTLCache:
+    """Process-wide LRU cache with per-entry TTL and single-flight loading.
+
+    With `stale_ttl`, expired entries are kept that much longer and served
+    by get_or_load_async() when the loader fails, e.g. while an upstream is down.
+
+    With `revalidate_ttl`, get_or_load_async() answers with an entry up to that
+    long past expiry right away and reloads it in the background
+    (stale-while-revalidate), so no caller waits on an expired entry.
+    """
+    def __init__(self, ttl: float, max_entries: int = 1024, stale_ttl: float = 0, revalidate_ttl: float = 0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.revalidate_ttl = revalidate_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._async_inflight: dict[tuple, asyncio.Future] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            return self._get_locked(key)
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._set_locked(key, value)
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # futures belong to one event loop, so flights are tracked per loop
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        with self._lock:
+            value, stale = self._lookup_locked(key, revalidate=True)
+            if value is not None and not stale:
+                return value
+            future = self._async_inflight.get(flight_key)
+            leader = future is None
+            if leader:
+                future = self._async_inflight[flight_key] = loop.create_future()
+
+        if value is not None:
+            if leader:
+                task = loop.create_task(self._revalidate_async(flight_key, key, loader, future))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return value
+
+        if not leader:
+            return await asyncio.shield(future)
+        return await self._load_async(flight_key, key, loader, future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "stale_served": self.stale_served,
+                "size": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+    # --- support functions ---
+    async def _load_async(
+        self,
+        flight_key: tuple,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        future: asyncio.Future
+    ) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            stale = self._get_stale(key)
+            if stale is not None:
+                future.set_result(stale)
+                return stale
+            future.set_exception(e)
+            # mark as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_inflight.pop(flight_key, None)
+
+    async def _revalidate_async(
+        self,
+        flight_key: tuple,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        future: asyncio.Future
+    ):
+        try:
+            await self._load_async(flight_key, key, loader, future)
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+
+    def _get_locked(self, key: Hashable) -> Any | None:
+        return self._lookup_locked(key)[0]
+
+    def _lookup_locked(self, key: Hashable, revalidate: bool = False) -> tuple[Any | None, bool]:
+        # (value, stale); stale values are only returned with `revalidate`
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, False
+        if revalidate and now < expires_at + self.revalidate_ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.stale_served += 1
+            return value, True
+        # kept for _get_stale and revalidation until both windows are over
+        if expires_at + max(self.stale_ttl, self.revalidate_ttl) <= now:
+            del self._entries[key]
+        self.misses += 1
+        return None, False
+
+    def _get_stale(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] + self.stale_ttl <= time.monotonic():
+                return None
+            self.stale_served += 1
+            return entry[1]
+
+    def _set_locked(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
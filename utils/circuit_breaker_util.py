@@ -0,0 +1,66 @@
+# utils/circuit_breaker_util.py
+import threading
+import time
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """Fails fast after `failure_threshold` consecutive failures.
+
+    Once open, calls are rejected for `reset_timeout` seconds; then a single
+    trial call is let through (half-open). Its success closes the circuit,
+    its failure opens it again.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        # start of the half-open trial call; a trial that never reports back
+        # (e.g. cancelled) stops blocking others after reset_timeout
+        self._trial_started: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def before_call(self):
+        # raises CircuitOpenError when the call must not go out
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            waited = now - self._opened_at
+            trial_running = self._trial_started is not None and now - self._trial_started < self.reset_timeout
+            if waited < self.reset_timeout or trial_running:
+                raise CircuitOpenError(self.name, max(self.reset_timeout - waited, 0))
+            self._trial_started = now
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def record_failure(self) -> bool:
+        # returns True when this failure tripped the circuit
+        with self._lock:
+            self._failures += 1
+            reopen = self._trial_started is not None
+            self._trial_started = None
+            if reopen or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                return True
+            return False
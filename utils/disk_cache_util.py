@@ -0,0 +1,55 @@
+# utils/disk_cache_util.py
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+class DiskLRUCache:
+    """Size-bounded byte cache in a directory; the least recently used files are evicted first."""
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.directory.iterdir() if p.is_file())
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # mtime doubles as the last-used time for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            # missing, or evicted right after we read it
+            return None
+        return data
+
+    def set(self, key: str, data: bytes):
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    # --- support functions ---
+    def _path(self, key: str) -> Path:
+        return self.directory / hashlib.sha1(key.encode()).hexdigest()
+
+    def _evict(self):
+        files = sorted(
+            (p for p in self.directory.iterdir() if p.is_file() and p.suffix != ".tmp"),
+            key=lambda p: p.stat().st_mtime
+        )
+        for p in files:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                size = p.stat().st_size
+                p.unlink()
+                self._size -= size
+            except FileNotFoundError:
+                continue
@@ -0,0 +1,161 @@
+# utils/http_util.py
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+import requests
+
+from utils.circuit_breaker_util import CircuitBreaker, CircuitOpenError
+from utils.metrics_util import observe_upstream, registry, upstream_name
+
+# initialize settings
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+TIMEOUT = httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+REQUESTS_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+# initialize variables
+_async_client: httpx.AsyncClient | None = None
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+RETRIES = registry.counter("http_retries_total", "Outbound HTTP calls retried.", ("upstream",))
+CIRCUIT_TRIPS = registry.counter("circuit_trips_total", "Times an upstream's circuit opened.", ("upstream",))
+CIRCUIT_REJECTED = registry.counter("circuit_rejected_total", "Calls refused because the circuit was open.", ("upstream",))
+_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+registry.gauge(
+    "circuit_state", "Circuit state per upstream: 0 closed, 1 half-open, 2 open.", ("upstream",),
+    lambda: {(name,): _STATE_VALUES[b.state] for name, b in list(_breakers.items())}
+)
+
+class UpstreamUnavailable(httpx.TransportError):
+    """The upstream's circuit is open, so the request was not sent."""
+    def __init__(self, message: str, request: httpx.Request, retry_in: float):
+        super().__init__(message, request=request)
+        self.retry_in = retry_in
+
+class _ResilientTransport(httpx.AsyncHTTPTransport):
+    """Pooled transport with per-upstream circuit breakers, retries and latency metrics.
+
+    Idempotent requests are retried on transport errors and 502/503/504;
+    any request is retried when it never reached the server.
+    """
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        upstream = upstream_name(url)
+        breaker = get_breaker(upstream)
+        idempotent = request.method in IDEMPOTENT_METHODS
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            try:
+                _before_call(breaker, upstream)
+            except CircuitOpenError as e:
+                raise UpstreamUnavailable(str(e), request, e.retry_in) from e
+
+            start = time.perf_counter()
+            try:
+                response = await super().handle_async_request(request)
+            except httpx.TransportError as e:
+                observe_upstream(url, "error", time.perf_counter() - start)
+                _record_failure(breaker, upstream)
+                not_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt < HTTP_MAX_RETRIES and (idempotent or not_sent):
+                    RETRIES.inc(upstream)
+                    await asyncio.sleep(_backoff(attempt))
+                    continue
+                raise
+            observe_upstream(url, response.status_code, time.perf_counter() - start)
+
+            if response.status_code < 500:
+                breaker.record_success()
+                return response
+            _record_failure(breaker, upstream)
+            if idempotent and response.status_code in RETRY_STATUSES and attempt < HTTP_MAX_RETRIES:
+                await response.aclose()
+                RETRIES.inc(upstream)
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            return response
+
+def new_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=_ResilientTransport(limits=POOL_LIMITS), timeout=TIMEOUT)
+
+def get_async_client() -> httpx.AsyncClient:
+    # shared keep-alive pool for the web server's event loop
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = new_async_client()
+    return _async_client
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+def request_sync(method: str, url: str, **kwargs) -> requests.Response:
+    """Blocking counterpart of the async clients' transport, for threads and one-off calls.
+
+    Raises CircuitOpenError without sending when the upstream's circuit is open.
+    """
+    kwargs.setdefault("timeout", REQUESTS_TIMEOUT)
+    upstream = upstream_name(url)
+    breaker = get_breaker(upstream)
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        _before_call(breaker, upstream)
+        start = time.perf_counter()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            observe_upstream(url, "error", time.perf_counter() - start)
+            _record_failure(breaker, upstream)
+            not_sent = isinstance(e, requests.ConnectTimeout)
+            if attempt < HTTP_MAX_RETRIES and (idempotent or not_sent):
+                RETRIES.inc(upstream)
+                time.sleep(_backoff(attempt))
+                continue
+            raise
+        observe_upstream(url, response.status_code, time.perf_counter() - start)
+
+        if response.status_code < 500:
+            breaker.record_success()
+            return response
+        _record_failure(breaker, upstream)
+        if idempotent and response.status_code in RETRY_STATUSES and attempt < HTTP_MAX_RETRIES:
+            RETRIES.inc(upstream)
+            time.sleep(_backoff(attempt))
+            continue
+        return response
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(upstream)
+        if breaker is None:
+            breaker = _breakers[upstream] = CircuitBreaker(upstream, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+        return breaker
+
+# --- support functions ---
+def _before_call(breaker: CircuitBreaker, upstream: str):
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        CIRCUIT_REJECTED.inc(upstream)
+        raise
+
+def _record_failure(breaker: CircuitBreaker, upstream: str):
+    if breaker.record_failure():
+        CIRCUIT_TRIPS.inc(upstream)
+        print(f"Circuit for {upstream} opened after repeated failures")
+
+def _backoff(attempt: int) -> float:
+    # full jitter, so retries from many callers don't line up
+    return random.uniform(0, HTTP_RETRY_BACKOFF * 2 ** attempt)
@@ -0,0 +1,42 @@
+# utils/leader_util.py
+import os
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, where we only ever run one process
+    fcntl = None
+
+class FileLeaderLock:
+    """Cross-process leadership through an exclusive, non-blocking flock on `path`.
+
+    The OS releases the lock when its holder exits, crash included, so a
+    process that keeps calling try_acquire() takes over from a dead leader.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None or fcntl is None
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # the holder's pid, for whoever is debugging a stuck lock
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
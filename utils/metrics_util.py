@@ -0,0 +1,173 @@
+# utils/metrics_util.py
+import bisect
+import contextlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Iterator
+
+# initialize settings
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    @abstractmethod
+    def _samples(self) -> Iterator[str]:
+        ...
+
+    def _labels(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{self._labels(labels)} {value}"
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; observe() is a bisect and a few adds under a lock."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{self._labels(labels, le)} {cumulative}"
+            cumulative += counts[len(self.buckets)]
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{self._labels(labels, le)} {cumulative}"
+            yield f"{self.name}_count{self._labels(labels)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(labels)} {counts[-1]}"
+
+class Gauge(_Metric):
+    """Gauge read on scrape from a callback returning {label values: value}."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], collect: Callable[[], dict[tuple, float]]):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def _samples(self) -> Iterator[str]:
+        for labels, value in self.collect().items():
+            yield f"{self.name}{self._labels(labels)} {value}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...], collect: Callable[[], dict[tuple, float]]) -> Gauge:
+        return self._register(Gauge(name, help, labelnames, collect))
+
+    def render(self) -> str:
+        # Prometheus text exposition format 0.0.4
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    # --- support functions ---
+    def _register(self, metric: _Metric):
+        with self._lock:
+            # modules may be re-imported (e.g. by reloaders); keep the first instance
+            return self._metrics.setdefault(metric.name, metric)
+
+# initialize variables
+registry = MetricsRegistry()
+_upstreams: list[tuple[str, str]] = []
+_caches: dict[str, Callable[[], dict]] = {}
+
+UPSTREAM_SECONDS = registry.histogram(
+    "upstream_request_seconds", "Latency of outbound HTTP calls.", ("upstream", "status")
+)
+
+def register_upstream(name: str, base_url: str):
+    # URLs starting with base_url are reported as `name` in upstream metrics
+    _upstreams.append((base_url, name))
+    _upstreams.sort(key=lambda u: len(u[0]), reverse=True)
+
+def upstream_name(url: str) -> str:
+    for base_url, name in _upstreams:
+        if url.startswith(base_url):
+            return name
+    return "other"
+
+def observe_upstream(url: str, status: int | str, seconds: float):
+    UPSTREAM_SECONDS.observe(seconds, upstream_name(url), str(status))
+
+def register_cache(name: str, stats: Callable[[], dict]):
+    # `stats` returns a dict with hits, misses, hit_ratio and size, like TTLCache.stats()
+    _caches[name] = stats
+
+def _collect_caches(field: str) -> dict[tuple, float]:
+    return {(name,): stats()[field] for name, stats in list(_caches.items())}
+
+registry.gauge("cache_hits", "Cache hits since start.", ("cache",), lambda: _collect_caches("hits"))
+registry.gauge("cache_misses", "Cache misses since start.", ("cache",), lambda: _collect_caches("misses"))
+registry.gauge("cache_hit_ratio", "Cache hit ratio since start.", ("cache",), lambda: _collect_caches("hit_ratio"))
+registry.gauge("cache_entries", "Entries currently cached.", ("cache",), lambda: _collect_caches("size"))
+
+# --- support functions ---
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,112 @@
+# utils/movie_util.py
+import os
+import sys
+import threading
+import weakref
+from typing import Any, Callable, Iterable
+
+# initialize settings
+IMAGE_BASE = os.getenv("TMDB_IMAGE_BASE", "https://image.tmdb.org/t/p/w500")
+
+# initialize variables
+_interned: "weakref.WeakValueDictionary[int, Movie]" = weakref.WeakValueDictionary()
+_genre_tuples: dict[tuple[int, ...], tuple[int, ...]] = {}
+_interned_lock = threading.Lock()
+_genre_lookup: Callable[[], dict] = dict
+
+class Movie:
+    """Immutable movie as shown in lists, shared by every cache and session holding it.
+
+    Genres are kept as TMDB genre IDs and the poster as TMDB's path; the
+    genre names and the image URL are derived when read. Build instances
+    with intern_movie() so each movie_id maps to a single object.
+    """
+    __slots__ = ("id", "title", "release_date", "genre_ids", "poster_path", "__weakref__")
+
+    def __init__(self, movie_id: int, title: str, release_date: str, genre_ids: tuple[int, ...], poster_path: str):
+        object.__setattr__(self, "id", movie_id)
+        object.__setattr__(self, "title", title)
+        object.__setattr__(self, "release_date", release_date)
+        object.__setattr__(self, "genre_ids", genre_ids)
+        object.__setattr__(self, "poster_path", poster_path)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("Movie is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("Movie is immutable")
+
+    @property
+    def genres(self) -> list[str]:
+        # IDs the genre map does not know (yet) are left out
+        names = _genre_lookup()
+        return [names[genre_id] for genre_id in self.genre_ids if genre_id in names]
+
+    @property
+    def poster(self) -> str:
+        return f"{IMAGE_BASE}{self.poster_path}" if self.poster_path else ""
+
+    def __getitem__(self, key: str) -> Any:
+        # dict-style access, as for the per-movie dicts this replaced
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def as_dict(self) -> dict:
+        # JSON-friendly form, read back with movie_from_dict()
+        return {
+            "id": self.id,
+            "title": self.title,
+            "release_date": self.release_date,
+            "genre_ids": list(self.genre_ids),
+            "poster_path": self.poster_path
+        }
+
+    def _fields(self) -> tuple:
+        return (self.id, self.title, self.release_date, self.genre_ids, self.poster_path)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Movie) and self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        return f"Movie(id={self.id}, title={self.title!r}, release_date={self.release_date!r})"
+
+def intern_movie(
+    movie_id: int,
+    title: str | None,
+    release_date: str | None,
+    genre_ids: Iterable[int],
+    poster_path: str | None
+) -> Movie:
+    # returns the live Movie for movie_id when its fields are unchanged
+    genre_ids = tuple(int(genre_id) for genre_id in genre_ids)
+    with _interned_lock:
+        genre_ids = _genre_tuples.setdefault(genre_ids, genre_ids)
+        fields = (int(movie_id), sys.intern(title or ""), sys.intern(release_date or ""), genre_ids, poster_path or "")
+        movie = _interned.get(fields[0])
+        if movie is None or movie._fields() != fields:
+            movie = _interned[fields[0]] = Movie(*fields)
+        return movie
+
+def movie_from_tmdb(result: dict) -> Movie:
+    # list endpoints carry genre_ids, /movie/{id} carries genre objects
+    genre_ids = result.get("genre_ids") or [g["id"] for g in result.get("genres", [])]
+    return intern_movie(result["id"], result.get("title"), result.get("release_date"), genre_ids, result.get("poster_path"))
+
+def movie_from_dict(data: dict) -> Movie:
+    return intern_movie(data["id"], data["title"], data["release_date"], data["genre_ids"], data["poster_path"])
+
+def set_genre_lookup(lookup: Callable[[], dict]):
+    # genre id -> name map used by Movie.genres
+    global _genre_lookup
+    _genre_lookup = lookup
+
+def interned_movie_count() -> int:
+    return len(_interned)
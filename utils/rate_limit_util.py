@@ -0,0 +1,144 @@
+# utils/rate_limit_util.py
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+class TokenBucket:
+    """Async token bucket allowing `rate` acquisitions per second with bursts up to `capacity`."""
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        # e.g. when the upstream answers 429 with a retry_after
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+        self._updated = self._paused_until
+
+    # --- support functions ---
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = now
+
+class ThreadSafeTokenBucket:
+    """Token bucket shared by event loops in different threads, e.g. concurrent delivery runs.
+
+    Each acquisition reserves the next free slot under a thread lock and
+    then sleeps until it comes up, so no asyncio primitive ties the bucket
+    to one loop.
+    """
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        # time at which the bucket would be full again if nothing else were acquired
+        self._full_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        delay = self._reserve()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            # a pause may have started while we waited
+            delay = self._paused_until - time.monotonic()
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # nothing saved up before the pause may burst right after it
+            self._full_at = max(self._full_at, self._paused_until + self.capacity / self.rate)
+
+    # --- support functions ---
+    def _reserve(self) -> float:
+        # returns how long the caller has to wait for its token
+        with self._lock:
+            now = time.monotonic()
+            interval = 1 / self.rate
+            full_at = max(self._full_at, now)
+            allowed_at = max(full_at + interval - self.capacity * interval, self._paused_until)
+            self._full_at = full_at + interval
+            return allowed_at - now
+
+class KeyedRateLimiter:
+    """Spaces out acquisitions for the same key (e.g. a chat_id) by `interval` seconds."""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_allowed: dict = {}
+
+    async def acquire(self, key):
+        now = time.monotonic()
+        allowed_at = self._next_allowed.get(key, now)
+        self._next_allowed[key] = max(allowed_at, now) + self.interval
+        if allowed_at > now:
+            await asyncio.sleep(allowed_at - now)
+
+    def forget(self, key):
+        self._next_allowed.pop(key, None)
+
+class _Slot:
+    """The call that last ran for a key and the latest one waiting behind it."""
+    def __init__(self, value: Any):
+        self.value = value
+        self.pending: tuple[Any, Callable[[Any], Awaitable[None]]] | None = None
+
+class KeyedCoalescer:
+    """Runs at most one call per key within `window` seconds; calls in between collapse into one.
+
+    The first call for a key runs right away. Calls arriving while it runs, or
+    within `window` after, only record their value; when the window closes the
+    latest one runs in the background. A value equal to the one that just ran
+    is dropped, e.g. a button pressed again before its message was edited.
+    """
+    def __init__(self, window: float):
+        self.window = window
+        self.coalesced = 0
+        self._slots: dict[Hashable, _Slot] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, value: Any, func: Callable[[Any], Awaitable[None]]) -> bool:
+        # returns False when the call was folded into another one
+        slot = self._slots.get(key)
+        if slot is not None:
+            self.coalesced += 1
+            if value != slot.value:
+                slot.pending = (value, func)
+            return False
+        self._slots[key] = _Slot(value)
+        try:
+            await func(value)
+        finally:
+            asyncio.get_running_loop().call_later(self.window, self._release, key)
+        return True
+
+    # --- support functions ---
+    def _release(self, key: Hashable):
+        slot = self._slots.pop(key, None)
+        if slot is None or slot.pending is None:
+            return
+        task = asyncio.create_task(self._run_pending(key, *slot.pending))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _run_pending(self, key: Hashable, value: Any, func: Callable[[Any], Awaitable[None]]):
+        try:
+            await self.submit(key, value, func)
+        except Exception as e:
+            print(f"Coalesced call for {key} failed: {e}")
@@ -0,0 +1,100 @@
+# utils/router_util.py
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+Handler = Callable[..., Awaitable[None] | None]
+TimingHook = Callable[[str, float], None]
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    name: str
+    handler: Handler
+    parse: Callable[[str], Any] = str
+    with_message_id: bool = False
+
+class UpdateRouter:
+    """Dispatches Telegram updates to handlers registered per command and callback prefix.
+
+    Commands are looked up by their first word ("/upcoming@MyBot 2" -> "/upcoming")
+    and callbacks by the text before the first "_" ("next_10" -> "next"), so
+    dispatch is one dict lookup however many routes exist. Callback payloads are
+    converted with the route's `parse` before the handler sees them.
+
+    Handlers are called as handler(chat_id, payload) and may be sync or async.
+    Callbacks registered with `with_message_id` also get the ID of the message
+    whose button was pressed, e.g. to edit it in place.
+    """
+    def __init__(self):
+        self._commands: dict[str, Route] = {}
+        self._callbacks: dict[str, Route] = {}
+        self._fallback: Route | None = None
+        self._timing_hooks: list[TimingHook] = []
+
+    def command(self, name: str) -> Callable[[Handler], Handler]:
+        # the payload of a command is the rest of the message text
+        def register(handler: Handler) -> Handler:
+            self._commands[name.lower()] = Route(name, handler)
+            return handler
+        return register
+
+    def callback(
+        self, prefix: str, parse: Callable[[str], Any] = str, with_message_id: bool = False
+    ) -> Callable[[Handler], Handler]:
+        def register(handler: Handler) -> Handler:
+            self._callbacks[prefix] = Route(f"callback_{prefix}", handler, parse, with_message_id)
+            return handler
+        return register
+
+    def fallback(self, handler: Handler) -> Handler:
+        # messages that match no command; the payload is the whole text
+        self._fallback = Route("message_unknown", handler)
+        return handler
+
+    def add_timing_hook(self, hook: TimingHook):
+        # hook(route_name, seconds) runs after every handled update
+        self._timing_hooks.append(hook)
+
+    async def dispatch(self, update: dict) -> bool:
+        # returns False when no route matched the update
+        if "callback_query" in update:
+            query = update["callback_query"]
+            prefix, _, raw = query.get("data", "").partition("_")
+            route = self._callbacks.get(prefix)
+            if route is None:
+                return False
+            try:
+                payload = route.parse(raw)
+            except ValueError:
+                print(f"Ignoring callback with malformed payload: {query.get('data')!r}")
+                return False
+            message = query["message"]
+            if route.with_message_id:
+                return await self._run(route, message["chat"]["id"], payload, message["message_id"])
+            return await self._run(route, message["chat"]["id"], payload)
+
+        message = update.get("message")
+        if message is None:
+            return False
+        text = message.get("text", "").strip()
+        word, _, args = text.partition(" ")
+        route = self._commands.get(word.split("@", 1)[0].lower())
+        if route is not None:
+            return await self._run(route, message["chat"]["id"], args.strip())
+        if self._fallback is not None:
+            return await self._run(self._fallback, message["chat"]["id"], text)
+        return False
+
+    # --- support functions ---
+    async def _run(self, route: Route, chat_id: int, payload: Any, *extra: Any) -> bool:
+        start = time.perf_counter()
+        try:
+            result = route.handler(chat_id, payload, *extra)
+            if inspect.isawaitable(result):
+                await result
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in self._timing_hooks:
+                hook(route.name, elapsed)
+        return True
@@ -1,16 +1,20 @@
 # utils/telegram_util.py
+import json
 import os
-import time
 
 from dotenv import load_dotenv
-import requests
+
+from utils.http_util import get_async_client
+from utils.metrics_util import register_upstream
 
 # load env file
 load_dotenv()
 
 # initialize settings
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-BASE_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+BASE_URL = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}"
+register_upstream("telegram", TELEGRAM_API_BASE)
 
 def generate_genre_inline_keyboard(genre_dict: dict, row_size: int = 2) -> dict:
     inline_keyboard = []
@@ -27,18 +31,72 @@ def generate_genre_inline_keyboard(genre_dict: dict, row_size: int = 2) -> dict:
     if row:
         inline_keyboard.append(row)
 
-    return {"inline_keyboard": inline_keyboard}   
+    return {"inline_keyboard": inline_keyboard}
+
+# --- async functions ---
+async def send_message_async(chat_id: int, text: str, inline_keyboard: dict | None = None):
+    payload = build_message_payload(chat_id, text, inline_keyboard)
+    return await get_async_client().post(f"{BASE_URL}/sendMessage", json=payload)
+
+async def send_photo_async(chat_id: int, photo_url: str, caption: str, inline_keyboard: dict | None = None):
+    payload = build_photo_payload(chat_id, photo_url, caption, inline_keyboard)
+    return await get_async_client().post(f"{BASE_URL}/sendPhoto", json=payload)
+
+async def send_photo_file_async(chat_id: int, photo: bytes, caption: str, inline_keyboard: dict | None = None):
+    # multipart upload of image bytes we already hold
+    data = {
+        "chat_id": str(chat_id),
+        "caption": caption,
+        "parse_mode": "HTML"
+    }
+    if inline_keyboard:
+        data["reply_markup"] = json.dumps(inline_keyboard)
+    files = {"photo": ("poster.jpg", photo, "image/jpeg")}
+    return await get_async_client().post(f"{BASE_URL}/sendPhoto", data=data, files=files)
+
+async def edit_message_text_async(chat_id: int, message_id: int, text: str, inline_keyboard: dict | None = None):
+    payload = build_message_payload(chat_id, text, inline_keyboard)
+    payload["message_id"] = message_id
+    return await get_async_client().post(f"{BASE_URL}/editMessageText", json=payload)
+
+async def edit_message_reply_markup_async(chat_id: int, message_id: int, inline_keyboard: dict):
+    return await get_async_client().post(f"{BASE_URL}/editMessageReplyMarkup", json={
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "reply_markup": inline_keyboard
+    })
+
+async def answer_callback_query_async(callback_query_id: str):
+    return await get_async_client().post(f"{BASE_URL}/answerCallbackQuery", json={
+        "callback_query_id": callback_query_id
+    })
 
-def send_message(chat_id: int, text: str, inline_keyboard: dict | None = None):
+# --- support functions ---
+def extract_photo_file_id(response) -> str | None:
+    # the largest size comes last in Telegram's PhotoSize list
+    try:
+        return response.json()["result"]["photo"][-1]["file_id"]
+    except Exception:
+        return None
+
+def is_message_not_modified(response) -> bool:
+    # Telegram refuses an edit that would leave the message as it is
+    return response.status_code == 400 and "message is not modified" in response.text
+
+def is_invalid_file_id(response) -> bool:
+    # e.g. "Bad Request: wrong file identifier/HTTP URL specified"
+    return response.status_code == 400 and "file" in response.text.lower()
+
+def build_message_payload(chat_id: int, text: str, inline_keyboard: dict | None) -> dict:
     payload = {
         "chat_id": chat_id,
         "text": text
     }
     if inline_keyboard:
         payload["reply_markup"] = inline_keyboard
-    requests.post(f"{BASE_URL}/sendMessage", json=payload)
+    return payload
 
-def send_photo(chat_id: int, photo_url: str, caption: str, inline_keyboard: dict | None = None):
+def build_photo_payload(chat_id: int, photo_url: str, caption: str, inline_keyboard: dict | None) -> dict:
     payload = {
         "chat_id": chat_id,
         "photo": photo_url,
@@ -47,7 +105,4 @@ def send_photo(chat_id: int, photo_url: str, caption: str, inline_keyboard: dict
     }
     if inline_keyboard:
         payload["reply_markup"] = inline_keyboard
-
-    r = requests.post(f"{BASE_URL}/sendPhoto", json=payload)
-    time.sleep(0.3)
-    return r
\ No newline at end of file
+    return payload
@@ -1,31 +1,35 @@
 # utils/tmdb_util.py
 import os
 import json
-import requests
+import threading
+import time
 
-def _fetch_genre(genre_file: str, bearer: str) -> bool:
-    url = "https://api.themoviedb.org/3/genre/movie/list?language=en"
+from utils.http_util import request_sync
+
+# initialize settings
+GENRE_RETRY_SECONDS = 60
+
+def _fetch_genre(genre_file: str, bearer: str, api_base: str) -> bool:
+    url = f"{api_base}/genre/movie/list?language=en"
     headers = {
         "accept": "application/json",
         "Authorization": f"Bearer {bearer}"
     }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = request_sync("GET", url, headers=headers)
         if response.status_code != 200:
             return False
         data = response.json()
-        with open(genre_file, "w", encoding="utf-8") as f:
+        # write then rename, so readers never see a half-written file
+        tmp_file = f"{genre_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, genre_file)
         return True
     except Exception as e:
         return False
 
-
-def load_genre(genre_file: str, bearer: str) -> dict:
-    if not os.path.exists(genre_file):
-        success = _fetch_genre(genre_file, bearer)
-        if not success:
-            return {}
+def _read_genre(genre_file: str) -> dict:
     try:
         with open(genre_file, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -39,5 +43,68 @@ def load_genre(genre_file: str, bearer: str) -> dict:
     except Exception as e:
         return {}
 
+class GenreCache:
+    """Genre map backed by `genre_file` and refreshed from TMDB in the background.
+
+    get() never waits on the network: it returns what is on disk (possibly
+    empty) and starts a refresh thread once the file is missing or older
+    than `ttl`. Each refresh swaps in a new dict, so callers can memoize on
+    the returned object.
+    """
+    def __init__(self, genre_file: str, bearer: str, api_base: str, ttl: float):
+        self.genre_file = genre_file
+        self.bearer = bearer
+        self.api_base = api_base
+        self.ttl = ttl
+        self._genres: dict | None = None
+        self._next_refresh = 0.0
+        self._refreshing = False
+        self._refreshed = threading.Event()
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        if self._genres is None:
+            self._load_file()
+        if time.time() >= self._next_refresh:
+            self.refresh_in_background()
+        return self._genres
+
+    def wait(self, timeout: float) -> dict:
+        # for callers that cannot do anything useful without genres
+        if not self.get():
+            self._refreshed.wait(timeout)
+        return self._genres or {}
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="genre-refresh", daemon=True).start()
+
+    # --- support functions ---
+    def _load_file(self):
+        genres = _read_genre(self.genre_file)
+        try:
+            next_refresh = os.path.getmtime(self.genre_file) + self.ttl if genres else 0.0
+        except OSError:
+            next_refresh = 0.0
+        with self._lock:
+            self._genres = genres
+            self._next_refresh = next_refresh
+
+    def _refresh(self):
+        try:
+            if _fetch_genre(self.genre_file, self.bearer, self.api_base):
+                self._load_file()
+            else:
+                # TMDB is unavailable; keep serving what we have and retry later
+                with self._lock:
+                    self._next_refresh = time.time() + GENRE_RETRY_SECONDS
+        finally:
+            with self._lock:
+                self._refreshing = False
+            self._refreshed.set()
+
 def find_genre(genre_dict: dict, genre_id: int) -> str:
-    return genre_dict[int(genre_id)]
\ No newline at end of file
+    return genre_dict.get(int(genre_id), "Unknown")
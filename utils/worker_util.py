@@ -0,0 +1,15 @@
+# utils/worker_util.py
+import multiprocessing
+import os
+
+def is_multi_worker() -> bool:
+    """Whether other worker processes may be serving the same bot.
+
+    WEB_CONCURRENCY decides when it is set. Otherwise a process started by
+    multiprocessing counts as one of several: that is how `uvicorn --workers N`
+    (and --reload) spawn workers, without setting WEB_CONCURRENCY.
+    """
+    concurrency = os.getenv("WEB_CONCURRENCY")
+    if concurrency:
+        return int(concurrency) > 1
+    return multiprocessing.parent_process() is not None